@@ -0,0 +1,158 @@
+"""
+Latency-driven controller that moves along a ladder of (model, input size) operating points
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import config
+
+
+def percentile(values: Sequence[float], pct: float) -> float:
+    """
+    Linearly interpolated percentile (same as numpy's default)
+
+    Pure Python, since pose_api imports this module before the inference
+    stack (and numpy) is loaded.
+    """
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    position = (len(ordered) - 1) * pct / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+class AdaptiveController:
+    def __init__(self, apply_fn: Callable[[str, int], None],
+                 ladder: Optional[List[Tuple[str, int]]] = None,
+                 start: Optional[Tuple[str, int]] = None,
+                 target_p95_ms: float = config.ADAPTIVE_TARGET_P95_MS,
+                 step_up_ratio: float = config.ADAPTIVE_STEP_UP_RATIO,
+                 max_queue_depth: int = config.ADAPTIVE_MAX_QUEUE_DEPTH,
+                 window: int = config.ADAPTIVE_WINDOW,
+                 min_samples: int = config.ADAPTIVE_MIN_SAMPLES,
+                 cooldown_s: float = config.ADAPTIVE_COOLDOWN_S):
+        """
+        Step the operating point down when the latency target is missed and back up with headroom
+
+        Hysteresis comes from the gap between the step-down threshold (the
+        target) and the step-up threshold (step_up_ratio * target), from
+        requiring min_samples fresh samples after each change, and from a
+        cooldown between changes.
+
+        Args:
+            apply_fn: Switches the detector to (model key in config.MODEL_OPTIONS, input size);
+                      runs on a background thread since loading a model can be slow
+            ladder: Operating points from heaviest to lightest (default: config.ADAPTIVE_LADDER)
+            start: Initial operating point (default: the ladder's first point)
+            target_p95_ms: Inference latency target for the rolling p95
+            step_up_ratio: Step back up only while p95 is below this fraction of the target
+            max_queue_depth: Step down when more frames than this wait for inference
+            window: Number of recent latency samples in the rolling p95
+            min_samples: Samples needed after a change before the next decision
+            cooldown_s: Minimum time between two changes
+        """
+        self.apply_fn = apply_fn
+        self.ladder = [tuple(point) for point in (ladder or config.ADAPTIVE_LADDER)]
+        self.target_p95_ms = target_p95_ms
+        self.step_up_ratio = step_up_ratio
+        self.max_queue_depth = max_queue_depth
+        self.min_samples = min_samples
+        self.cooldown_s = cooldown_s
+
+        self.index = self.ladder.index(tuple(start)) if start and tuple(start) in self.ladder else 0
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=window)
+        self._queue_depth = 0
+        self._last_change = time.monotonic()
+        self._switching = False
+        self.steps_down = 0
+        self.steps_up = 0
+        self.last_error = None
+
+    @property
+    def operating_point(self) -> dict:
+        """Current model key and input size"""
+        model, input_size = self.ladder[self.index]
+        return {'model': model, 'input_size': input_size, 'level': self.index}
+
+    def observe(self, latency_ms: float, queue_depth: int):
+        """
+        Record one inference latency and the current inference queue depth, and maybe change level
+
+        Args:
+            latency_ms: Time the frame spent in the inference stage
+            queue_depth: Frames currently waiting for inference
+        """
+        with self._lock:
+            # Frames measured during a switch belong to neither operating point
+            if self._switching:
+                return
+            self._latencies.append(latency_ms)
+            self._queue_depth = queue_depth
+            target_index = self._decide()
+            if target_index is None:
+                return
+            self._switching = True
+
+        threading.Thread(target=self._switch, args=(target_index,),
+                         name='pose-adaptive-switch', daemon=True).start()
+
+    def _decide(self) -> Optional[int]:
+        """Pick the next ladder index, or None to stay (called with the lock held)"""
+        if (len(self._latencies) < self.min_samples
+                or time.monotonic() - self._last_change < self.cooldown_s):
+            return None
+
+        p95 = percentile(self._latencies, 95)
+        if (p95 > self.target_p95_ms or self._queue_depth > self.max_queue_depth) \
+                and self.index < len(self.ladder) - 1:
+            return self.index + 1
+        if p95 < self.step_up_ratio * self.target_p95_ms and self._queue_depth == 0 and self.index > 0:
+            return self.index - 1
+        return None
+
+    def _switch(self, target_index: int):
+        """Apply a new operating point and reset the measurements"""
+        model, input_size = self.ladder[target_index]
+        try:
+            self.apply_fn(model, input_size)
+        except Exception as e:
+            self.last_error = str(e)
+            print(f"! Could not switch to {model} @ {input_size}: {e}")
+            with self._lock:
+                self._switching = False
+                self._last_change = time.monotonic()
+            return
+
+        with self._lock:
+            if target_index > self.index:
+                self.steps_down += 1
+            else:
+                self.steps_up += 1
+            self.index = target_index
+            self._latencies.clear()
+            self._last_change = time.monotonic()
+            self._switching = False
+        print(f"✓ Operating point: {model} @ {input_size}")
+
+    def stats(self) -> dict:
+        """Get the operating point, rolling latency and change counters"""
+        with self._lock:
+            latencies = list(self._latencies)
+            return {
+                **self.operating_point,
+                'ladder': [list(point) for point in self.ladder],
+                'target_p95_ms': self.target_p95_ms,
+                'p95_ms': percentile(latencies, 95),
+                'samples': len(latencies),
+                'queue_depth': self._queue_depth,
+                'switching': self._switching,
+                'steps_down': self.steps_down,
+                'steps_up': self.steps_up,
+                'last_error': self.last_error
+            }
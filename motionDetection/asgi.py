@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+Production server: the Flask API behind an async front end with admission control
+
+Requests are accepted on an asyncio event loop (uvicorn). /detect and
+/detect_batch are admitted up to config.SERVER_MAX_CONCURRENCY at a time and
+answered with an immediate 503 beyond that; admitted requests run the Flask
+app on a bounded thread pool. Those threads share one inference engine: with
+micro-batching the per-frame work runs on them but model calls (including ROI
+crops) go through the micro-batcher's thread, with REPLICA_WORKERS they go to
+the replica processes, and otherwise through the pipeline's inference stage.
+The in-process model additionally serializes its calls with a lock, so it
+never runs two predictions at once. /stream connections run
+streaming.run_stream on their own bounded pool.
+
+Usage:
+    python asgi.py
+    uvicorn asgi:app --host 0.0.0.0 --port 5110
+"""
+
+import asyncio
+import io
+import json
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple
+from urllib.parse import parse_qsl
+
+import config
+import metrics
+import pose_api
+
+# Paths counted against the concurrency limit, by metrics endpoint label
+ADMITTED_PATHS = {'/detect': 'detect', '/detect_batch': 'detect_batch'}
+
+# WebSocket close codes
+WS_POLICY_VIOLATION = 1008
+WS_TRY_AGAIN_LATER = 1013
+
+
+def wsgi_environ(scope: dict, body: bytes) -> dict:
+    """Build a WSGI environ for an ASGI HTTP request whose body was read in full"""
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': str(server[0]),
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': str(client[0]),
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False
+    }
+
+    for name, value in scope.get('headers', []):
+        name = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        if name == 'CONTENT_TYPE':
+            environ['CONTENT_TYPE'] = value
+        elif name != 'CONTENT_LENGTH':
+            key = f'HTTP_{name}'
+            environ[key] = f'{environ[key]},{value}' if key in environ else value
+    return environ
+
+
+def run_wsgi(wsgi_app, environ: dict) -> Tuple[int, List[Tuple[bytes, bytes]], bytes]:
+    """
+    Run a WSGI app to completion (called on a worker thread)
+
+    Returns:
+        Tuple of (status code, ASGI headers, body)
+    """
+    response = {}
+
+    def start_response(status, headers, exc_info=None):
+        response['status'] = int(status.split(' ', 1)[0])
+        response['headers'] = [(name.encode('latin-1'), value.encode('latin-1')) for name, value in headers]
+
+    result = wsgi_app(environ, start_response)
+    try:
+        body = b''.join(result)
+    finally:
+        # Flask runs its teardown hooks here
+        if hasattr(result, 'close'):
+            result.close()
+    return response['status'], response['headers'], body
+
+
+class PoseServer:
+    def __init__(self, wsgi_app, worker_threads: int = config.SERVER_WORKER_THREADS,
+                 max_concurrency: int = config.SERVER_MAX_CONCURRENCY,
+                 max_streams: int = config.SERVER_MAX_STREAMS):
+        """
+        ASGI application serving a WSGI app with admission control
+
+        The in-flight and stream counters are only touched on the event loop,
+        so they need no lock.
+
+        Args:
+            wsgi_app: Flask (WSGI) application
+            worker_threads: Threads running WSGI requests
+            max_concurrency: Detection requests admitted at once; the rest get an immediate 503
+            max_streams: Concurrent /stream connections
+        """
+        self.wsgi_app = wsgi_app
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.max_streams = max(1, int(max_streams))
+        self.executor = ThreadPoolExecutor(max_workers=max(1, int(worker_threads)),
+                                           thread_name_prefix='pose-http')
+        self.stream_executor = ThreadPoolExecutor(max_workers=self.max_streams,
+                                                  thread_name_prefix='pose-stream')
+        self.in_flight = 0
+        self.streams = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'http':
+            await self.handle_http(scope, receive, send)
+        elif scope['type'] == 'websocket':
+            await self.handle_websocket(scope, receive, send)
+        elif scope['type'] == 'lifespan':
+            await self.handle_lifespan(receive, send)
+
+    async def handle_lifespan(self, receive, send):
+        """Start loading the model once at server startup and stop the pools at shutdown"""
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                pose_api.start_background_startup()
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.executor.shutdown(wait=False)
+                self.stream_executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def handle_http(self, scope, receive, send):
+        endpoint = ADMITTED_PATHS.get(scope['path'])
+        if endpoint is not None:
+            if self.in_flight >= self.max_concurrency:
+                # Answer before reading the body, so overload costs almost nothing
+                metrics.REJECTED.inc(endpoint=endpoint)
+                await self.send_overloaded(send)
+                return
+            self.in_flight += 1
+
+        try:
+            body = await self.read_body(receive)
+            if body is None:
+                return
+            status, headers, payload = await asyncio.get_running_loop().run_in_executor(
+                self.executor, run_wsgi, self.wsgi_app, wsgi_environ(scope, body))
+            await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+            await send({'type': 'http.response.body', 'body': payload})
+        finally:
+            if endpoint is not None:
+                self.in_flight -= 1
+
+    @staticmethod
+    async def read_body(receive):
+        """Read the full request body, or None if the client disconnected"""
+        chunks = []
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return None
+            chunks.append(message.get('body', b''))
+            if not message.get('more_body', False):
+                return b''.join(chunks)
+
+    async def send_overloaded(self, send):
+        body = json.dumps({
+            'success': False,
+            'error': 'Server is at capacity, retry shortly',
+            'max_concurrency': self.max_concurrency
+        }).encode('utf-8')
+        await send({'type': 'http.response.start', 'status': 503, 'headers': [
+            (b'content-type', b'application/json'),
+            (b'retry-after', str(config.SERVER_RETRY_AFTER_S).encode('ascii'))
+        ]})
+        await send({'type': 'http.response.body', 'body': body})
+
+    async def handle_websocket(self, scope, receive, send):
+        """Bridge a /stream WebSocket to the blocking receive/send used by pose_api.serve_stream"""
+        message = await receive()
+        if message['type'] != 'websocket.connect':
+            return
+        if scope['path'] != '/stream':
+            await send({'type': 'websocket.close', 'code': WS_POLICY_VIOLATION})
+            return
+        if self.streams >= self.max_streams:
+            metrics.REJECTED.inc(endpoint='stream')
+            await send({'type': 'websocket.close', 'code': WS_TRY_AGAIN_LATER})
+            return
+
+        self.streams += 1
+        loop = asyncio.get_running_loop()
+        incoming = asyncio.Queue()
+        connected = True
+
+        async def pump():
+            """Move client messages into the queue; None marks the disconnect"""
+            nonlocal connected
+            while True:
+                event = await receive()
+                if event['type'] == 'websocket.receive':
+                    await incoming.put(event['bytes'] if event.get('bytes') is not None else event.get('text'))
+                elif event['type'] == 'websocket.disconnect':
+                    connected = False
+                    await incoming.put(None)
+                    return
+
+        async def send_message(data):
+            if connected:
+                key = 'bytes' if isinstance(data, (bytes, bytearray)) else 'text'
+                await send({'type': 'websocket.send', key: data})
+
+        def blocking_receive():
+            return asyncio.run_coroutine_threadsafe(incoming.get(), loop).result()
+
+        def blocking_send(data):
+            asyncio.run_coroutine_threadsafe(send_message(data), loop).result()
+
+        args = dict(parse_qsl(scope.get('query_string', b'').decode('latin-1')))
+        try:
+            await send({'type': 'websocket.accept'})
+            pump_task = asyncio.create_task(pump())
+            try:
+                await loop.run_in_executor(self.stream_executor, pose_api.serve_stream,
+                                           blocking_receive, blocking_send, args)
+            finally:
+                pump_task.cancel()
+            if connected:
+                await send({'type': 'websocket.close', 'code': 1000})
+        except Exception as e:
+            print(f"Error in stream connection: {e}")
+        finally:
+            self.streams -= 1
+
+
+app = PoseServer(pose_api.app)
+
+
+if __name__ == '__main__':
+    import uvicorn
+
+    print("Initializing YOLO pose detection API...")
+    print(f"Starting production server on port {config.SERVER_PORT} "
+          f"(max {app.max_concurrency} concurrent detection requests, {app.max_streams} streams)")
+    uvicorn.run(app, host=config.SERVER_HOST, port=config.SERVER_PORT, log_level='warning')
@@ -0,0 +1,137 @@
+"""
+Dynamic micro-batching scheduler for single-frame pose detection requests
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import List, Optional
+
+import config
+
+
+class MicroBatcher:
+    def __init__(self, detector, max_batch_size: int = config.MICRO_BATCH_MAX_SIZE,
+                 max_wait_ms: float = config.MICRO_BATCH_WINDOW_MS,
+                 max_queue_depth: int = config.INFERENCE_QUEUE_DEPTH):
+        """
+        Collect concurrent single-frame requests into batched model calls
+
+        Args:
+            detector: Object providing detect_poses_many(frames, max_batch_size, input_size)
+            max_batch_size: Maximum number of frames per batched inference
+            max_wait_ms: How long to wait for more frames after the first one arrives
+            max_queue_depth: Maximum frames waiting for inference; submit blocks beyond it
+        """
+        self.detector = detector
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait_ms = max_wait_ms
+
+        self._queue = queue.Queue(maxsize=max_queue_depth)
+        self._stats_lock = threading.Lock()
+        self.batches_run = 0
+        self.frames_processed = 0
+
+        self._thread = threading.Thread(target=self._run, name='pose-micro-batcher', daemon=True)
+        self._thread.start()
+
+    def submit(self, frame, input_size: Optional[int] = None) -> Future:
+        """
+        Queue a frame for the next batch
+
+        Args:
+            frame: Input image frame
+            input_size: Model input size (default: the detector's current one);
+                        frames of a batch are grouped by input size
+
+        Returns:
+            Future resolving to the frame's list of pose analysis results
+        """
+        future = Future()
+        self._queue.put((frame, input_size, future))
+        return future
+
+    def detect_poses(self, frame, timeout: Optional[float] = None) -> List[dict]:
+        """Detect poses in a single frame through the shared batch queue"""
+        return self.submit(frame).result(timeout=timeout)
+
+    def detect_poses_many(self, frames: List, timeout: Optional[float] = None,
+                          input_size: Optional[int] = None) -> List[List[dict]]:
+        """Detect poses in several frames through the shared batch queue, in input order"""
+        futures = [self.submit(frame, input_size) for frame in frames]
+        return [future.result(timeout=timeout) for future in futures]
+
+    def queue_depth(self) -> int:
+        """Number of frames waiting for the next batch"""
+        return self._queue.qsize()
+
+    def stop(self):
+        """Stop the scheduler thread after the queued frames are processed"""
+        self._queue.put(None)
+        self._thread.join()
+
+    def stats(self) -> dict:
+        """Get batching statistics"""
+        with self._stats_lock:
+            batches_run = self.batches_run
+            frames_processed = self.frames_processed
+
+        return {
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait_ms,
+            'queue_depth': self.queue_depth(),
+            'batches_run': batches_run,
+            'frames_processed': frames_processed,
+            'average_batch_size': frames_processed / batches_run if batches_run else 0.0
+        }
+
+    def _run(self):
+        """Scheduler loop: wait for a frame, gather more for a short window, run the batch"""
+        running = True
+        while running:
+            item = self._queue.get()
+            if item is None:
+                break
+
+            batch = [item]
+            deadline = time.monotonic() + self.max_wait_ms / 1000.0
+
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    running = False
+                    break
+                batch.append(item)
+
+            self._process(batch)
+
+    def _process(self, batch: list):
+        """Run one batched inference per input size and resolve each caller's future"""
+        # Skip frames whose callers have already given up
+        groups = {}
+        for frame, input_size, future in batch:
+            if future.set_running_or_notify_cancel():
+                groups.setdefault(input_size, []).append((frame, future))
+
+        for input_size, group in groups.items():
+            try:
+                results = self.detector.detect_poses_many([frame for frame, _ in group],
+                                                          max_batch_size=len(group), input_size=input_size)
+            except Exception as e:
+                for _, future in group:
+                    future.set_exception(e)
+                continue
+
+            with self._stats_lock:
+                self.batches_run += 1
+                self.frames_processed += len(group)
+
+            for (_, future), pose_results in zip(group, results):
+                future.set_result(pose_results)
@@ -0,0 +1,433 @@
+#!/usr/bin/env python3
+"""
+Benchmark pose detection inference backends and the detection hot path
+
+Usage:
+    python benchmark.py --backends torch onnx openvino --video ../public/videos/temu-ad.mp4
+    python benchmark.py --suite --output bench.json
+    python benchmark.py --suite --models nano --input-sizes 320 --baseline bench.json
+    python benchmark.py --import-budget
+"""
+
+import argparse
+import gc
+import glob
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import Callable, List, Optional, Sequence
+
+try:
+    import resource  # Unix only; peak RSS is reported as None elsewhere
+except ImportError:
+    resource = None
+
+import cv2
+import numpy as np
+
+import config
+import utils
+from pose_detector import PoseDetector, INFERENCE_BACKENDS
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_VIDEOS = os.path.join(HERE, '..', 'public', 'videos', '*.mp4')
+
+# Normalized (x, y) of the 17 COCO keypoints of a person standing with both arms
+# raised (the target pose), inside a unit person box
+SKELETON_TEMPLATE = np.array([
+    [0.50, 0.12], [0.53, 0.10], [0.47, 0.10], [0.56, 0.11], [0.44, 0.11],
+    [0.62, 0.22], [0.38, 0.22], [0.70, 0.12], [0.30, 0.12], [0.72, 0.02],
+    [0.28, 0.02], [0.58, 0.52], [0.42, 0.52], [0.58, 0.74], [0.42, 0.74],
+    [0.58, 0.96], [0.42, 0.96]
+], dtype=np.float32)
+
+
+def load_frames(video_path: Optional[str], count: int,
+                width: int = config.DISPLAY_WIDTH, height: int = config.DISPLAY_HEIGHT) -> List[np.ndarray]:
+    """
+    Load benchmark frames from a video, or generate fixed synthetic frames
+
+    Args:
+        video_path: Video to sample frames from (None for synthetic frames)
+        count: Number of frames to load
+        width: Synthetic frame width
+        height: Synthetic frame height
+
+    Returns:
+        List of BGR frames
+    """
+    if video_path is None:
+        rng = np.random.default_rng(0)
+        return [rng.integers(0, 256, (height, width, 3), dtype=np.uint8) for _ in range(count)]
+
+    capture = cv2.VideoCapture(video_path)
+    frames = []
+    try:
+        while len(frames) < count:
+            ok, frame = capture.read()
+            if not ok:
+                break
+            frames.append(frame)
+    finally:
+        capture.release()
+
+    if not frames:
+        raise ValueError(f"Could not read any frames from {video_path}")
+    return frames
+
+
+def load_videos(pattern: str, count: int) -> dict:
+    """Load benchmark frames from every video matching a glob pattern, keyed by file name"""
+    sources = {}
+    for video_path in sorted(glob.glob(pattern)):
+        try:
+            sources[os.path.basename(video_path)] = load_frames(video_path, count)
+        except ValueError as e:
+            print(f"! Skipping video: {e}")
+    return sources
+
+
+def synthetic_people(people: int, width: int = config.DISPLAY_WIDTH,
+                     height: int = config.DISPLAY_HEIGHT):
+    """
+    Lay out fixed synthetic skeletons on a grid covering the frame
+
+    Args:
+        people: Number of people
+        width: Frame width
+        height: Frame height
+
+    Returns:
+        Tuple of (N, 17, 3) keypoints, (N, 4) xyxy boxes and (N,) confidences
+    """
+    columns = max(1, int(np.ceil(np.sqrt(people))))
+    rows = max(1, int(np.ceil(people / columns)))
+    cell_w, cell_h = width / columns, height / rows
+
+    keypoints = np.empty((people, len(SKELETON_TEMPLATE), 3), dtype=np.float32)
+    bboxes = np.empty((people, 4), dtype=np.float32)
+    for i in range(people):
+        x1, y1 = (i % columns) * cell_w, (i // columns) * cell_h
+        keypoints[i, :, 0] = x1 + SKELETON_TEMPLATE[:, 0] * cell_w
+        keypoints[i, :, 1] = y1 + SKELETON_TEMPLATE[:, 1] * cell_h
+        keypoints[i, :, 2] = 0.9
+        bboxes[i] = (x1, y1, x1 + cell_w, y1 + cell_h)
+    return keypoints, bboxes, np.full(people, 0.9, dtype=np.float32)
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Get a percentile of a list of timings"""
+    return float(np.percentile(values, pct)) if values else 0.0
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process so far, in MB (None where unsupported)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes on Linux
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def rss_mb() -> Optional[float]:
+    """Current resident set size of this process, in MB (None where /proc is unavailable)"""
+    try:
+        with open('/proc/self/statm') as f:
+            resident_pages = int(f.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+    return resident_pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+
+
+def time_calls(fn: Callable, inputs: Sequence, iterations: int, warmup: int = 3) -> dict:
+    """
+    Time a function called on inputs in turn
+
+    Args:
+        fn: Function taking one input
+        inputs: Inputs to cycle through
+        iterations: Number of timed calls
+        warmup: Number of untimed calls before timing starts
+
+    Returns:
+        Dictionary with throughput and latency statistics
+    """
+    for i in range(warmup):
+        fn(inputs[i % len(inputs)])
+
+    timings_ms = []
+    start = time.perf_counter()
+    for i in range(iterations):
+        call_start = time.perf_counter()
+        fn(inputs[i % len(inputs)])
+        timings_ms.append((time.perf_counter() - call_start) * 1000)
+    elapsed = time.perf_counter() - start
+
+    return {
+        'iterations': iterations,
+        'fps': iterations / elapsed if elapsed > 0 else 0.0,
+        'mean_ms': float(np.mean(timings_ms)),
+        'p50_ms': percentile(timings_ms, 50),
+        'p95_ms': percentile(timings_ms, 95),
+        'p99_ms': percentile(timings_ms, 99)
+    }
+
+
+def benchmark_detector(detector: PoseDetector, frames: List[np.ndarray],
+                       iterations: int, warmup: int = 3) -> dict:
+    """
+    Time detect_poses over a set of frames
+
+    Args:
+        detector: Pose detector to benchmark
+        frames: Frames to cycle through
+        iterations: Number of timed detect_poses calls
+        warmup: Number of untimed calls before timing starts
+
+    Returns:
+        Dictionary with throughput and latency statistics
+    """
+    return time_calls(detector.detect_poses, frames, iterations, warmup)
+
+
+def benchmark_backends(backends: List[str], frames: List[np.ndarray], iterations: int,
+                       model_path: str = config.YOLO_MODEL) -> dict:
+    """
+    Compare inference backends on the same frames
+
+    Returns:
+        Dictionary mapping backend name to its statistics, with 'speedup_vs_torch'
+        added when the torch backend is part of the run
+    """
+    results = {}
+    for backend in backends:
+        print(f"Benchmarking {backend} backend...")
+        load_start = time.perf_counter()
+        detector = PoseDetector(model_path, optimize_for_speed=True, backend=backend)
+        load_time_s = time.perf_counter() - load_start
+
+        results[backend] = benchmark_detector(detector, frames, iterations)
+        results[backend]['load_time_s'] = load_time_s
+
+    if 'torch' in results:
+        torch_mean = results['torch']['mean_ms']
+        for stats in results.values():
+            stats['speedup_vs_torch'] = torch_mean / stats['mean_ms'] if stats['mean_ms'] > 0 else 0.0
+
+    return results
+
+
+def run_suite(models: List[str], input_sizes: List[int], people_counts: List[int],
+              sources: dict, iterations: int, backend: str = config.INFERENCE_BACKEND) -> List[dict]:
+    """
+    Sweep the detection hot path over models, input sizes and people per frame
+
+    detect_poses runs for every model, input size and frame source, with a
+    fresh detector per model (the previous one released first) so memory
+    figures are not inflated by models cached earlier in the sweep.
+    analyze_poses (utils.analyze_poses_array), build_results (the detector's
+    array-to-results step), draw_poses and image decode/encode do not depend
+    on the model, so they run once per people count on synthetic skeletons
+    drawn over the first synthetic frame.
+
+    Args:
+        models: Keys of config.MODEL_OPTIONS
+        input_sizes: Model input sizes
+        people_counts: People per frame for the per-person stages
+        sources: Frame lists keyed by source name ('synthetic' or a video file name)
+        iterations: Timed calls per case
+        backend: Inference backend
+
+    Returns:
+        One dictionary per case with its parameters, statistics, current RSS and peak RSS so far
+    """
+    # Decode/encode come from the API module so the exact request path is timed
+    import pose_api
+    pose_api.load_inference_stack()
+
+    cases = []
+
+    def record(benchmark: str, stats: dict, **params):
+        case = {'benchmark': benchmark, **params, **stats, 'rss_mb': rss_mb(), 'peak_rss_mb': peak_rss_mb()}
+        cases.append(case)
+        print(f"  {benchmark:<14} {json.dumps(params):<60} p50 {stats['p50_ms']:>8.2f} ms  "
+              f"p95 {stats['p95_ms']:>8.2f} ms  p99 {stats['p99_ms']:>8.2f} ms")
+
+    detector = None
+    for model in models:
+        detector = None
+        gc.collect()
+        detector = PoseDetector(config.MODEL_OPTIONS[model], optimize_for_speed=True, backend=backend)
+        for input_size in input_sizes:
+            detector.set_operating_point(config.MODEL_OPTIONS[model], input_size)
+            for source, frames in sources.items():
+                people = [len(detector.detect_poses(frame)) for frame in frames]
+                stats = time_calls(detector.detect_poses, frames, iterations)
+                stats['people_mean'] = float(np.mean(people))
+                record('detect_poses', stats, model=model, input_size=input_size, source=source)
+
+    frame = next(iter(sources.values()))[0]
+    for people in people_counts:
+        keypoints, bboxes, confidences = synthetic_people(people, frame.shape[1], frame.shape[0])
+        pose_results = detector._pose_results_from_arrays(keypoints, bboxes, confidences, None)
+        drawn = detector.draw_poses(frame, pose_results)
+        encoded = pose_api.encode_image(drawn)
+
+        record('analyze_poses', time_calls(utils.analyze_poses_array, [keypoints], iterations), people=people)
+        record('build_results',
+               time_calls(lambda kp: detector._pose_results_from_arrays(kp, bboxes, confidences, None),
+                          [keypoints], iterations), people=people)
+        record('draw_poses', time_calls(lambda results: detector.draw_poses(frame, results),
+                                        [pose_results], iterations), people=people)
+        record('encode_image', time_calls(pose_api.encode_image, [drawn], iterations), people=people)
+        record('decode_image', time_calls(pose_api.decode_image, [encoded], iterations), people=people)
+
+    return cases
+
+
+def git_commit() -> Optional[str]:
+    """Current commit of the working tree, for comparing result files"""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=HERE, check=True,
+                              capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def case_key(case: dict) -> tuple:
+    """Identify a case across result files by everything except its measurements"""
+    return tuple((name, case.get(name)) for name in ('benchmark', 'model', 'input_size', 'source', 'people'))
+
+
+def compare_to_baseline(cases: List[dict], baseline_path: str):
+    """Print each case's p50/p95 relative to the same case in an earlier result file"""
+    with open(baseline_path) as f:
+        baseline = {case_key(case): case for case in json.load(f)['cases']}
+
+    print(f"{'case':<70} {'p50 change':>11} {'p95 change':>11}")
+    for case in cases:
+        before = baseline.get(case_key(case))
+        if before is None:
+            continue
+        label = ' '.join(f"{value}" for _, value in case_key(case) if value is not None)
+        changes = [(case[stat] / before[stat] - 1) * 100 if before[stat] > 0 else 0.0
+                   for stat in ('p50_ms', 'p95_ms')]
+        print(f"{label:<70} {changes[0]:>+10.1f}% {changes[1]:>+10.1f}%")
+
+
+def measure_import_time(module: str = 'pose_api', runs: int = 3) -> dict:
+    """
+    Time importing a module in fresh interpreters (nothing cached in sys.modules)
+
+    Args:
+        module: Module to import
+        runs: Number of fresh interpreters to time
+
+    Returns:
+        Dictionary with per-run and best import times in milliseconds
+    """
+    script = ("import time; start = time.perf_counter(); "
+              f"import {module}; print((time.perf_counter() - start) * 1000)")
+    timings_ms = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, '-c', script], cwd=HERE, check=True,
+                                capture_output=True, text=True).stdout
+        timings_ms.append(float(output.strip().splitlines()[-1]))
+
+    return {
+        'module': module,
+        'runs_ms': timings_ms,
+        'best_ms': min(timings_ms),
+        'budget_ms': config.IMPORT_TIME_BUDGET_MS
+    }
+
+
+def print_table(results: dict):
+    """Print benchmark results as a table"""
+    print(f"{'backend':<10} {'fps':>8} {'mean ms':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'speedup':>8}")
+    for backend, stats in results.items():
+        speedup = stats.get('speedup_vs_torch')
+        print(f"{backend:<10} {stats['fps']:>8.1f} {stats['mean_ms']:>9.2f} {stats['p50_ms']:>8.2f} "
+              f"{stats['p95_ms']:>8.2f} {stats['p99_ms']:>8.2f} "
+              f"{(f'{speedup:.2f}x' if speedup is not None else '-'):>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark pose detection inference backends')
+    parser.add_argument('--backends', nargs='+', default=list(INFERENCE_BACKENDS),
+                        choices=list(INFERENCE_BACKENDS),
+                        help='Backends to compare (--suite runs on the first one)')
+    parser.add_argument('--model', default=config.YOLO_MODEL, help='YOLO pose model')
+    parser.add_argument('--video', default=None, help='Video to sample frames from (default: synthetic)')
+    parser.add_argument('--frames', type=int, default=30, help='Number of distinct frames')
+    parser.add_argument('--iterations', type=int, default=100, help='Timed detect_poses calls per backend')
+    parser.add_argument('--output', default=None, help='Write results as JSON to this file')
+    parser.add_argument('--import-budget', action='store_true',
+                        help='Only check pose_api import time against config.IMPORT_TIME_BUDGET_MS')
+    parser.add_argument('--suite', action='store_true',
+                        help='Sweep models, input sizes and people counts over the detection hot path')
+    parser.add_argument('--models', nargs='+', default=list(config.MODEL_OPTIONS),
+                        choices=list(config.MODEL_OPTIONS), help='Models for --suite')
+    parser.add_argument('--input-sizes', nargs='+', type=int, default=[640, 416, 320],
+                        help='Model input sizes for --suite')
+    parser.add_argument('--people', nargs='+', type=int, default=[0, 1, 4, 8],
+                        help='People per frame for the per-person stages in --suite')
+    parser.add_argument('--videos', default=DEFAULT_VIDEOS,
+                        help='Glob of videos to sample frames from in --suite (besides synthetic frames)')
+    parser.add_argument('--baseline', default=None,
+                        help='Earlier --suite result file to compare p50/p95 against')
+    args = parser.parse_args()
+
+    if args.import_budget:
+        result = measure_import_time()
+        within_budget = result['best_ms'] <= result['budget_ms']
+        print(f"{'✓' if within_budget else '!'} import {result['module']}: {result['best_ms']:.0f} ms "
+              f"(budget {result['budget_ms']} ms)")
+        sys.exit(0 if within_budget else 1)
+
+    if args.suite:
+        sources = {'synthetic': load_frames(None, args.frames)}
+        sources.update(load_videos(args.videos, args.frames))
+        print(f"Benchmarking {len(args.models)} models x {len(args.input_sizes)} input sizes "
+              f"on {len(sources)} frame sources...")
+        cases = run_suite(args.models, args.input_sizes, args.people, sources, args.iterations,
+                          args.backends[0])
+        print(f"Peak RSS: {peak_rss_mb() or 0:.0f} MB")
+
+        if args.baseline:
+            compare_to_baseline(cases, args.baseline)
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump({
+                    'commit': git_commit(),
+                    'timestamp': datetime.now().isoformat(),
+                    'python': platform.python_version(),
+                    'platform': platform.platform(),
+                    'iterations': args.iterations,
+                    'peak_rss_mb': peak_rss_mb(),
+                    'cases': cases
+                }, f, indent=2)
+            print(f"Results written to {args.output}")
+        return
+
+    frames = load_frames(args.video, args.frames)
+    results = benchmark_backends(args.backends, frames, args.iterations, args.model)
+    print_table(results)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({
+                'model': args.model,
+                'input_size': config.INPUT_SIZE,
+                'video': args.video,
+                'results': results
+            }, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
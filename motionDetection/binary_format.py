@@ -0,0 +1,134 @@
+"""
+Compact binary encoding for pose detection responses
+
+Layout (all values little-endian):
+
+    header       28 bytes, see HEADER_FORMAT
+    bboxes       float32 (N, 4)      x1, y1, x2, y2 (NaN when no box)
+    confidences  float32 (N,)
+    keypoints    float32 (N, K, 3)   x, y, confidence
+    flags        uint8   (N,)        FLAG_* bits
+    metadata     metadata_size bytes UTF-8 JSON object with the response's other
+                                     fields (operating_point, session, frame_id, cached)
+    image        image_size bytes    optional encoded processed image (JPEG or WebP)
+
+where N is the number of people and K the number of keypoints (17 for COCO).
+"""
+
+import json
+import struct
+from typing import List, Optional
+
+import numpy as np
+
+import config
+
+MIME_TYPE = 'application/x-pose-detections'
+MAGIC = b'POSE'
+VERSION = 2
+
+# magic, version, reserved, num_people, width, height, num_keypoints, reserved,
+# processing_time_ms, image_size, metadata_size
+HEADER_FORMAT = '<4sBBHHHHHfII'
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+
+# Per-person flag bits
+FLAG_TARGET_POSE = 1 << 0
+FLAG_STANDING = 1 << 1
+FLAG_ARMS_RAISED = 1 << 2
+FLAG_HAS_BBOX = 1 << 3
+
+NUM_KEYPOINTS = len(config.KEYPOINTS)
+
+
+def pack_detections(pose_results: List[dict], width: int, height: int,
+                    processing_time_ms: float, image_bytes: Optional[bytes] = None,
+                    metadata: Optional[dict] = None) -> bytes:
+    """
+    Pack pose analysis results into the compact binary format
+
+    Args:
+        pose_results: List of pose analysis results from PoseDetector
+        width: Source image width
+        height: Source image height
+        processing_time_ms: Server-side processing time
+        image_bytes: Optional encoded processed image to append
+        metadata: Other JSON-serializable response fields (e.g. operating_point)
+
+    Returns:
+        Encoded response body
+    """
+    num_people = len(pose_results)
+    image_bytes = image_bytes or b''
+    metadata_bytes = json.dumps(metadata).encode('utf-8') if metadata else b''
+
+    bboxes = np.full((num_people, 4), np.nan, dtype='<f4')
+    confidences = np.zeros(num_people, dtype='<f4')
+    keypoints = np.zeros((num_people, NUM_KEYPOINTS, 3), dtype='<f4')
+    flags = np.zeros(num_people, dtype=np.uint8)
+
+    for i, result in enumerate(pose_results):
+        if 'raw_keypoints' in result:
+            keypoints[i] = np.asarray(result['raw_keypoints']).reshape(NUM_KEYPOINTS, 3)
+        if 'bbox' in result:
+            bboxes[i] = result['bbox'][:4]
+            flags[i] |= FLAG_HAS_BBOX
+        confidences[i] = result.get('confidence', 0.0)
+        if result['target_pose_detected']:
+            flags[i] |= FLAG_TARGET_POSE
+        if result.get('standing', False):
+            flags[i] |= FLAG_STANDING
+        if result.get('arms_raised', False):
+            flags[i] |= FLAG_ARMS_RAISED
+
+    header = struct.pack(HEADER_FORMAT, MAGIC, VERSION, 0, num_people, width, height,
+                         NUM_KEYPOINTS, 0, processing_time_ms, len(image_bytes), len(metadata_bytes))
+
+    return b''.join((header, bboxes.tobytes(), confidences.tobytes(),
+                     keypoints.tobytes(), flags.tobytes(), metadata_bytes, image_bytes))
+
+
+def unpack_detections(payload: bytes) -> dict:
+    """
+    Decode a compact binary response (for Python clients and benchmarks)
+
+    Args:
+        payload: Encoded response body
+
+    Returns:
+        Dictionary with header fields, the metadata fields, 'bboxes', 'confidences',
+        'keypoints' and 'flags' arrays plus the optional 'image' bytes
+    """
+    (magic, version, _, num_people, width, height, num_keypoints, _,
+     processing_time_ms, image_size, metadata_size) = struct.unpack_from(HEADER_FORMAT, payload)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError('not a pose detections payload')
+
+    offset = HEADER_SIZE
+
+    def read(dtype, count, shape):
+        nonlocal offset
+        array = np.frombuffer(payload, dtype=dtype, count=count, offset=offset).reshape(shape)
+        offset += array.nbytes
+        return array
+
+    bboxes = read('<f4', num_people * 4, (num_people, 4))
+    confidences = read('<f4', num_people, (num_people,))
+    keypoints = read('<f4', num_people * num_keypoints * 3, (num_people, num_keypoints, 3))
+    flags = read(np.uint8, num_people, (num_people,))
+
+    metadata = json.loads(bytes(payload[offset:offset + metadata_size])) if metadata_size else {}
+    offset += metadata_size
+
+    return {
+        'people_detected': num_people,
+        'width': width,
+        'height': height,
+        'processing_time_ms': processing_time_ms,
+        **metadata,
+        'bboxes': bboxes,
+        'confidences': confidences,
+        'keypoints': keypoints,
+        'flags': flags,
+        'image': bytes(payload[offset:offset + image_size])
+    }
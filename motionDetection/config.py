@@ -14,10 +14,53 @@ MODEL_OPTIONS = {
     'xlarge': "yolov8x-pose.pt"     # Slowest, highest accuracy
 }
 
+# Inference backend: 'torch' (PyTorch .pt), 'onnx' (ONNX Runtime) or 'openvino'
+# Non-torch backends export YOLO_MODEL once and reuse the artifact from EXPORT_CACHE_DIR
+INFERENCE_BACKEND = 'torch'
+EXPORT_CACHE_DIR = 'exported_models'
+
 # Performance optimizations for faster inference
 OPTIMIZE_FOR_SPEED = True
 INPUT_SIZE = 640  # Smaller input size for faster processing (default: 640)
 # For even faster processing, try: 416, 320, or 224
+MAX_BATCH_SIZE = 16  # Maximum frames sent to the model in one batched call
+
+# CPU inference tuning (half precision is only used on GPUs)
+CPU_INTRA_OP_THREADS = None  # Threads per operator; None uses every core available to the process
+CPU_INTER_OP_THREADS = 1     # Threads for running independent operators in parallel
+CPU_CHANNELS_LAST = False    # Use NHWC memory format for CPU convolutions (after conv+BN fusion)
+TORCH_COMPILE = False        # Compile the model graph with torch.compile (slow first call)
+
+# Cross-request micro-batching for /detect
+ENABLE_MICRO_BATCHING = True  # Queue concurrent single-frame requests into one inference
+MICRO_BATCH_MAX_SIZE = 8      # Maximum frames collected into one micro-batch
+MICRO_BATCH_WINDOW_MS = 5     # How long to wait for more frames after the first arrives
+
+# Multi-process replica pool (0 = single in-process detector)
+# Each replica is a separate process pinned to its own core set; micro-batching is
+# bypassed in this mode and concurrent requests are routed to the least-loaded replica
+REPLICA_WORKERS = 0
+REPLICA_CORES_PER_WORKER = None  # Cores per replica; None splits the available cores evenly
+REPLICA_START_TIMEOUT_S = 300    # Maximum time for a replica to load and warm up its model
+REPLICA_RESULT_TIMEOUT_S = 30    # Maximum time to wait for a replica's detection results
+REPLICA_HEALTH_CHECK_S = 1.0     # How often to check for replica processes that have exited
+
+# Staged request pipeline: decode/encode worker pools around a single inference stage
+PIPELINE_DECODE_WORKERS = 2   # Threads decoding incoming images
+PIPELINE_ENCODE_WORKERS = 2   # Threads drawing, encoding and serializing responses
+PIPELINE_QUEUE_DEPTH = 32     # Jobs allowed to wait per decode/encode stage before callers block
+INFERENCE_QUEUE_DEPTH = 32    # Frames allowed to wait for inference before callers block
+PIPELINE_TIMING_WINDOW = 500  # Recent jobs per stage used for percentile timings
+
+# Startup: the server binds immediately and loads the model in the background
+IMPORT_TIME_BUDGET_MS = 1000  # Warn (and fail benchmark.py --import-budget) when pose_api import exceeds this
+
+# Startup warm-up: synthetic frames run before the service reports ready
+# Frames are letterboxed to the model input size, so warm-up covers every input size
+# in use (INPUT_SIZE, ROI_INPUT_SIZE and, with ADAPTIVE_ENABLED, each ladder rung)
+WARMUP_IMAGE = None                             # Warm-up frame; None uses ultralytics' bundled bus.jpg (people in it)
+WARMUP_BATCH_SIZES = [1, MICRO_BATCH_MAX_SIZE]  # Single frames and full /detect micro-batches
+WARMUP_ITERATIONS = 2                           # Passes per input size and batch size
 
 # Detection Confidence Thresholds
 PERSON_CONFIDENCE_THRESHOLD = 0.4  # Lowered for faster processing
@@ -63,6 +106,7 @@ DISPLAY_HEIGHT = 720
 FONT_SCALE = 1.0
 FONT_THICKNESS = 2
 LINE_THICKNESS = 3
+RENDER_PREVIEW_MAX_DIM = 0  # Longer side of returned images; poses are drawn on the preview (0 = full resolution)
 
 # Colors (BGR format for OpenCV)
 COLORS = {
@@ -76,4 +120,73 @@ COLORS = {
 
 # Alert Settings
 ALERT_DURATION = 2.0  # seconds to show alert
-CONSECUTIVE_FRAMES_THRESHOLD = 5  # frames needed to confirm pose
\ No newline at end of file
+CONSECUTIVE_FRAMES_THRESHOLD = 5  # frames needed to confirm pose
+
+# Per-session state (one session per camera/client stream)
+SESSION_HISTORY_SIZE = 10      # Frames kept in each session's detection ring buffer
+SESSION_TTL_SECONDS = 300      # Idle sessions are evicted after this many seconds
+SESSION_MAX_COUNT = 1000       # Memory cap: least recently used sessions are evicted beyond this
+
+# Tracking mode: full pose inference every k frames, optical flow in between
+TRACKING_ENABLED = False         # Default for /detect (per request: "track" option)
+STREAM_TRACKING_ENABLED = True   # Default for /stream connections
+TRACKING_DETECT_INTERVAL = 5     # Run the pose model at least every this many frames
+TRACKING_MIN_QUALITY = 0.6       # Re-detect early when fewer keypoints than this fraction could be tracked
+TRACKING_IOU_THRESHOLD = 0.3     # Minimum box IoU for a detection to keep a tracked person's id
+TRACKING_MAX_DIM = 320           # Longest side of the grayscale frame used for optical flow
+
+# Motion gate: reuse the last detections while a session's frames stay static
+MOTION_GATE_ENABLED = True             # Default for /stream and /detect with a session_id (per request: "motion_gate" option)
+MOTION_GATE_THRESHOLD = 6.0            # Mean absolute grayscale difference (0-255) in any grid cell that counts as motion
+MOTION_GATE_THUMBNAIL_SIZE = (64, 36)  # (width, height) of the comparison thumbnail
+MOTION_GATE_GRID_SIZE = (16, 9)        # (columns, rows) of cells the difference is averaged over (4x4 thumbnail pixels each)
+MOTION_GATE_MAX_SKIPPED_FRAMES = 30    # Run the model at least once every this many skipped frames
+
+# Result cache: identical image payloads reuse their detections without decoding
+RESULT_CACHE_ENABLED = True
+RESULT_CACHE_MAX_ENTRIES = 1024              # Maximum cached frames
+RESULT_CACHE_MAX_BYTES = 32 * 1024 * 1024    # Approximate memory cap for cached results
+
+# ROI refinement: pose on padded crops around the previous frame's people
+ROI_ENABLED = False             # Default for /detect and /stream (per request: "roi" option)
+ROI_INPUT_SIZE = 320            # Model input size for person crops
+ROI_PADDING = 0.2               # Crop margin as a fraction of the person box's longer side
+ROI_MIN_CROP_SIZE = 64          # Minimum crop width and height in pixels
+ROI_MIN_IOU = 0.1               # Minimum overlap between a crop's detection and the previous box
+ROI_FULL_FRAME_INTERVAL = 10    # Full-frame detection at least every this many frames (finds new people)
+ROI_MAX_AREA_RATIO = 0.5        # Use the full frame when crops would cover more of it than this
+
+# Adaptive operating point: step along a (model, input size) ladder to hold a latency target
+ADAPTIVE_ENABLED = False
+ADAPTIVE_LADDER = [          # Heaviest first; model keys from MODEL_OPTIONS
+    ('small', 640),
+    ('nano', 640),
+    ('nano', 416),
+    ('nano', 320),
+    ('nano', 224)
+]
+ADAPTIVE_TARGET_P95_MS = 150     # Step down when the rolling p95 inference latency exceeds this
+ADAPTIVE_STEP_UP_RATIO = 0.5     # Step back up only while p95 is below this fraction of the target
+ADAPTIVE_MAX_QUEUE_DEPTH = 8     # Step down when more frames than this wait for inference
+ADAPTIVE_WINDOW = 200            # Latency samples in the rolling p95
+ADAPTIVE_MIN_SAMPLES = 30        # Fresh samples required after a change before the next decision
+ADAPTIVE_COOLDOWN_S = 10         # Minimum seconds between two changes
+
+# Offline video processing (process_video.py)
+VIDEO_FRAME_STRIDE = 1      # Run detection on every Nth frame (skipped frames are grabbed, not decoded)
+VIDEO_QUEUE_SIZE = 64       # Decoded frames buffered between the decode thread and inference
+
+# Returned (processed) image encoding
+IMAGE_FORMAT = 'jpeg'          # 'jpeg' or 'webp' (per request: "image_format")
+IMAGE_QUALITY = 85             # Encoder quality 1-100 (per request: "image_quality")
+IMAGE_TRANSPORT = 'inline'     # 'inline' base64, 'id' (fetch from /images/<id>) or 'binary' multipart part
+IMAGE_STORE_MAX_ENTRIES = 256              # Images kept for the 'id' transport
+IMAGE_STORE_MAX_BYTES = 64 * 1024 * 1024   # Approximate memory cap for stored images
+
+# Production server (asgi.py): admission control in front of the Flask app
+SERVER_HOST = '0.0.0.0'
+SERVER_PORT = 5110
+SERVER_WORKER_THREADS = 32     # Threads running Flask request handlers (keep above SERVER_MAX_CONCURRENCY)
+SERVER_MAX_CONCURRENCY = 24    # /detect and /detect_batch requests admitted at once; the rest get a fast 503
+SERVER_MAX_STREAMS = 16        # Concurrent /stream connections; more are closed with "try again later"
+SERVER_RETRY_AFTER_S = 1       # Retry-After sent with overload responses
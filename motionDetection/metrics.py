@@ -0,0 +1,187 @@
+"""
+Minimal thread-safe Prometheus metrics (counters, gauges, histograms) and text exposition
+"""
+
+import threading
+from bisect import bisect_left
+from typing import Dict, List, Tuple
+
+# Latency buckets in seconds, from sub-millisecond JPEG work to slow model calls
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _format_labels(labelnames: Tuple[str, ...], labelvalues: Tuple[str, ...], extra: str = '') -> str:
+    """Render {name="value",...} for a sample, or '' without labels"""
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, labelvalues)]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    metric_type = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.metric_type}']
+        lines.extend(self._samples())
+        return lines
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    metric_type = 'counter'
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        super().__init__(name, documentation, labelnames)
+        # Unlabeled metrics are exported as 0 before their first update
+        self._values = {} if self.labelnames else {(): 0}
+
+    def inc(self, amount: float = 1, **labels):
+        """Increase the counter (amount must not be negative)"""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            values = list(self._values.items())
+        return [f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}'
+                for key, value in values]
+
+
+class Gauge(_Metric):
+    metric_type = 'gauge'
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values = {} if self.labelnames else {(): 0}
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            values = list(self._values.items())
+        return [f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}'
+                for key, value in values]
+
+
+class Histogram(_Metric):
+    metric_type = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [per-bucket counts (+Inf last), sum]
+        self._series = {}
+
+    def observe(self, value: float, **labels):
+        """Record one observation: a bisect and two increments under the lock"""
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            series = [(key, list(counts), total) for key, (counts, total) in self._series.items()]
+
+        lines = []
+        for key, counts, total in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f'{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}')
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f'{self.name}_sum{labels} {_format_value(total)}')
+            lines.append(f'{self.name}_count{labels} {cumulative}')
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        """Collection of metrics rendered together"""
+        self._metrics = []
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text exposition format"""
+        with self._lock:
+            metrics = list(self._metrics)
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+# Per-stage latency of the detection path
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    'pose_stage_duration_seconds',
+    'Time spent per stage: decode, preprocess, inference, analysis, drawing, encoding, total',
+    ('stage',)))
+
+REQUESTS = REGISTRY.register(Counter(
+    'pose_requests_total', 'Detection requests and streamed frames handled', ('endpoint',)))
+ERRORS = REGISTRY.register(Counter(
+    'pose_errors_total', 'Detection requests and streamed frames that failed', ('endpoint',)))
+PEOPLE_DETECTED = REGISTRY.register(Counter(
+    'pose_people_detected_total', 'People detected across all processed frames'))
+TARGET_POSES = REGISTRY.register(Counter(
+    'pose_target_pose_detections_total', 'People detected in the target pose'))
+REJECTED = REGISTRY.register(Counter(
+    'pose_rejected_total', 'Requests and streams turned away by admission control', ('endpoint',)))
+
+IN_FLIGHT = REGISTRY.register(Gauge(
+    'pose_in_flight_requests', 'Detection requests and streamed frames currently being processed'))
+QUEUE_DEPTH = REGISTRY.register(Gauge(
+    'pose_queue_depth', 'Jobs waiting in each pipeline stage', ('stage',)))
+MOTION_GATE_SKIP_RATIO = REGISTRY.register(Gauge(
+    'pose_motion_gate_skip_ratio', 'Fraction of gated frames that reused cached detections'))
+RESULT_CACHE_HIT_RATIO = REGISTRY.register(Gauge(
+    'pose_result_cache_hit_ratio', 'Fraction of result cache lookups that hit'))
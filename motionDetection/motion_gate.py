@@ -0,0 +1,79 @@
+"""
+Per-session motion gate that skips inference on frames that barely changed
+"""
+
+import threading
+from typing import List, Optional
+
+import cv2
+import numpy as np
+
+import config
+
+
+class MotionGate:
+    def __init__(self, threshold: float = config.MOTION_GATE_THRESHOLD,
+                 thumbnail_size: tuple = config.MOTION_GATE_THUMBNAIL_SIZE,
+                 grid_size: tuple = config.MOTION_GATE_GRID_SIZE,
+                 max_skipped_frames: int = config.MOTION_GATE_MAX_SKIPPED_FRAMES):
+        """
+        Compare frames against the last inferred frame of a stream
+
+        Each frame is shrunk to a tiny grayscale thumbnail and compared with
+        the thumbnail of the last frame that went through the model. The
+        absolute difference is averaged per cell of a coarse grid; only when
+        every cell stays below threshold are that frame's detections reused
+        instead of running the model again. A frame-wide mean would dilute
+        small local motion (one raised arm in a wide view) below the threshold.
+
+        Args:
+            threshold: Mean absolute grayscale difference (0-255) in any grid cell that counts as motion
+            thumbnail_size: (width, height) of the comparison thumbnail
+            grid_size: (columns, rows) of the grid the difference is averaged over
+            max_skipped_frames: Run the model at least once every this many consecutive skipped frames
+        """
+        self.threshold = threshold
+        self.thumbnail_size = tuple(thumbnail_size)
+        self.grid_size = tuple(grid_size)
+        self.max_skipped_frames = max_skipped_frames
+
+        self.lock = threading.Lock()
+        self._reference = None
+        self._reference_shape = None
+        self._results = None
+        self.skipped_in_a_row = 0
+        self.last_difference = None
+
+    def thumbnail(self, frame: np.ndarray) -> np.ndarray:
+        """Downscale first (cheap on the tiny output), then convert to grayscale"""
+        small = cv2.resize(frame, self.thumbnail_size, interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+
+    def cached_results(self, frame: np.ndarray, thumbnail: np.ndarray) -> Optional[List[dict]]:
+        """
+        Get the last inferred frame's results if this frame is static relative to it
+
+        Returns:
+            Copies of the cached pose results marked 'cached', or None when the model should run
+        """
+        if (self._reference is None or frame.shape != self._reference_shape
+                or self.skipped_in_a_row >= self.max_skipped_frames):
+            self.last_difference = None
+            return None
+
+        # Largest per-cell mean difference (INTER_AREA averages each cell)
+        difference = cv2.absdiff(thumbnail, self._reference).astype(np.float32)
+        cell_differences = cv2.resize(difference, self.grid_size, interpolation=cv2.INTER_AREA)
+        self.last_difference = float(np.max(cell_differences))
+        if self.last_difference >= self.threshold:
+            return None
+
+        self.skipped_in_a_row += 1
+        return [dict(result, cached=True) for result in self._results]
+
+    def store(self, frame: np.ndarray, thumbnail: np.ndarray, pose_results: List[dict]):
+        """Make an inferred frame the new reference"""
+        self._reference = thumbnail
+        self._reference_shape = frame.shape
+        self._results = pose_results
+        self.skipped_in_a_row = 0
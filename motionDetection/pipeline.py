@@ -0,0 +1,182 @@
+"""
+Staged request pipeline: decode and encode worker pools around a single inference stage
+"""
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+import numpy as np
+
+import config
+
+
+class PipelineStage:
+    def __init__(self, name: str, workers: int = 0, queue_depth: int = config.PIPELINE_QUEUE_DEPTH,
+                 depth_provider: Optional[Callable[[], int]] = None):
+        """
+        One pipeline stage with its own workers, bounded queue and timings
+
+        Args:
+            name: Stage name used in statistics
+            workers: Worker threads; 0 runs the stage inline in the calling thread
+                     (for stages that already queue work internally)
+            queue_depth: Maximum jobs waiting for a worker; callers block beyond it
+            depth_provider: Reports the queue depth of an inline stage's own queue
+        """
+        self.name = name
+        self.workers = workers
+        self.queue_depth = queue_depth
+        self._depth_provider = depth_provider
+
+        self._executor = None
+        self._slots = None
+        if workers > 0:
+            self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f'pose-{name}')
+            self._slots = threading.BoundedSemaphore(workers + queue_depth)
+
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._active = 0
+        self.completed = 0
+        self.errors = 0
+        self._total_wait_ms = 0.0
+        self._total_run_ms = 0.0
+        self._recent_run_ms = deque(maxlen=config.PIPELINE_TIMING_WINDOW)
+
+    def submit(self, fn: Callable, *args) -> Future:
+        """
+        Queue fn(*args) on this stage, blocking while the stage queue is full
+
+        Returns:
+            Future resolving to fn's result
+        """
+        submitted = time.perf_counter()
+        if self._executor is None:
+            future = Future()
+            try:
+                future.set_result(self._execute(submitted, fn, args))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+
+        with self._lock:
+            self._queued += 1
+        self._slots.acquire()
+        future = self._executor.submit(self._execute, submitted, fn, args)
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def run(self, fn: Callable, *args) -> Any:
+        """Run fn(*args) on this stage and wait for its result"""
+        return self.submit(fn, *args).result()
+
+    def map(self, fn: Callable, items: list) -> list:
+        """Run fn on every item concurrently on this stage, returning results in order"""
+        futures = [self.submit(fn, item) for item in items]
+        return [future.result() for future in futures]
+
+    def depth(self) -> int:
+        """Jobs waiting for a worker (or in the inline stage's own queue)"""
+        if self._depth_provider is not None:
+            return self._depth_provider()
+        with self._lock:
+            return self._queued
+
+    def _execute(self, submitted: float, fn: Callable, args: tuple) -> Any:
+        started = time.perf_counter()
+        with self._lock:
+            if self._executor is not None:
+                self._queued -= 1
+            self._active += 1
+
+        failed = False
+        try:
+            return fn(*args)
+        except Exception:
+            failed = True
+            raise
+        finally:
+            run_ms = (time.perf_counter() - started) * 1000
+            with self._lock:
+                self._active -= 1
+                self.completed += 1
+                self.errors += failed
+                self._total_wait_ms += (started - submitted) * 1000
+                self._total_run_ms += run_ms
+                self._recent_run_ms.append(run_ms)
+
+    def stats(self) -> dict:
+        """Get queue depth and timing statistics for this stage"""
+        with self._lock:
+            recent = list(self._recent_run_ms)
+            completed = self.completed
+            stats = {
+                'workers': self.workers,
+                'queue_depth': self._queued,
+                'max_queue_depth': self.queue_depth,
+                'active': self._active,
+                'completed': completed,
+                'errors': self.errors,
+                'mean_wait_ms': self._total_wait_ms / completed if completed else 0.0,
+                'mean_run_ms': self._total_run_ms / completed if completed else 0.0
+            }
+
+        if self._depth_provider is not None:
+            stats['queue_depth'] = self._depth_provider()
+        stats['p50_run_ms'] = float(np.percentile(recent, 50)) if recent else 0.0
+        stats['p95_run_ms'] = float(np.percentile(recent, 95)) if recent else 0.0
+        return stats
+
+
+class DetectionPipeline:
+    def __init__(self, decode_workers: int = config.PIPELINE_DECODE_WORKERS,
+                 encode_workers: int = config.PIPELINE_ENCODE_WORKERS,
+                 inference_workers: int = 1,
+                 inference_depth_provider: Optional[Callable[[], int]] = None):
+        """
+        Decode -> inference -> encode pipeline shared by all requests
+
+        Each request still runs its stages in order, but stages from different
+        requests overlap: while one frame is in the model, others are being
+        decoded or encoded on their own pools.
+
+        Args:
+            decode_workers: Threads decoding incoming images
+            encode_workers: Threads building responses (drawing, image encoding, serialization)
+            inference_workers: Threads for the inference stage; 0 when the stage
+                               has its own queue and thread (the micro-batcher)
+            inference_depth_provider: Queue depth of that external inference queue
+        """
+        self.stages = {
+            'decode': PipelineStage('decode', decode_workers),
+            'inference': PipelineStage('inference', inference_workers,
+                                       depth_provider=inference_depth_provider),
+            'encode': PipelineStage('encode', encode_workers)
+        }
+
+    def decode(self, fn: Callable, *args) -> Any:
+        """Run a decode job"""
+        return self.stages['decode'].run(fn, *args)
+
+    def decode_many(self, fn: Callable, items: list) -> list:
+        """Run decode jobs for several items concurrently"""
+        return self.stages['decode'].map(fn, items)
+
+    def infer(self, fn: Callable, *args) -> Any:
+        """Run an inference job"""
+        return self.stages['inference'].run(fn, *args)
+
+    def encode(self, fn: Callable, *args) -> Any:
+        """Run a response-building job"""
+        return self.stages['encode'].run(fn, *args)
+
+    def encode_many(self, fn: Callable, items: list) -> list:
+        """Run response-building jobs for several items concurrently"""
+        return self.stages['encode'].map(fn, items)
+
+    def stats(self) -> dict:
+        """Get statistics for every stage"""
+        return {name: stage.stats() for name, stage in self.stages.items()}
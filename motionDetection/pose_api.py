@@ -4,78 +4,764 @@ Flask API for YOLO pose detection
 Accepts image data and returns pose detection results
 """
 
+import time
+_import_start = time.perf_counter()
+
 import os
+import atexit
 import base64
+import functools
 import json
-import cv2
-import numpy as np
-from flask import Flask, request, jsonify
+from collections import namedtuple
+from flask import Flask, Response, g, request, jsonify
 from flask_cors import CORS
-import time
+from flask_sock import Sock
+import threading
+import uuid
 from datetime import datetime
-from pose_detector import PoseDetector
+from batching import MicroBatcher
+from result_cache import ResultCache, estimate_size
+from adaptive import AdaptiveController
+import metrics
+import streaming
+from session_state import DEFAULT_SESSION
 import config
-import io
-from PIL import Image
+
+# Heavy inference stack (numpy, OpenCV, torch/ultralytics), bound by
+# load_inference_stack() so the HTTP server can bind before it is imported
+cv2 = np = None
+PoseDetector = DetectionPipeline = ReplicaPool = binary_format = render = None
+inference_stack_lock = threading.Lock()
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
+sock = Sock(app)  # WebSocket support for /stream
+
+# Endpoints counted in the request, error, in-flight and total-latency metrics
+INSTRUMENTED_ENDPOINTS = {'detect_poses': 'detect', 'detect_poses_batch': 'detect_batch'}
+
+@app.before_request
+def start_request_metrics():
+    endpoint = INSTRUMENTED_ENDPOINTS.get(request.endpoint)
+    if endpoint is not None:
+        g.metrics_endpoint = endpoint
+        g.metrics_start = time.perf_counter()
+        metrics.IN_FLIGHT.inc()
+
+@app.after_request
+def record_request_metrics(response):
+    endpoint = g.get('metrics_endpoint')
+    if endpoint is not None:
+        metrics.REQUESTS.inc(endpoint=endpoint)
+        if response.status_code >= 400:
+            metrics.ERRORS.inc(endpoint=endpoint)
+    return response
+
+@app.teardown_request
+def finish_request_metrics(exception):
+    start = g.pop('metrics_start', None)
+    if start is not None:
+        metrics.IN_FLIGHT.dec()
+        metrics.STAGE_SECONDS.observe(time.perf_counter() - start, stage='total')
 
 # Global detector instance
 detector = None
 
+# Readiness: set once the model is loaded and warmed up (separate from liveness)
+ready_event = threading.Event()
+warmup_timings = {}
+
+# Background startup progress reported on /health
+# ('idle' means no background startup was started and models load lazily on first use)
+startup_state = {
+    'stage': 'idle',
+    'stage_times_s': {},
+    'error': None
+}
+startup_lock = threading.Lock()
+detector_lock = threading.Lock()
+
+# Latency-driven operating point controller (ADAPTIVE_ENABLED)
+controller = None
+
+# Results for repeated image payloads, shared by all request threads
+result_cache = ResultCache() if config.RESULT_CACHE_ENABLED else None
+
+# Encoded images returned with image_transport "id", served by /images/<id>
+image_store = ResultCache(config.IMAGE_STORE_MAX_ENTRIES, config.IMAGE_STORE_MAX_BYTES)
+
+# Global micro-batching scheduler for /detect
+batcher = None
+batcher_lock = threading.Lock()
+
+# Global multi-process replica pool (REPLICA_WORKERS > 0)
+replica_pool = None
+replica_pool_lock = threading.Lock()
+
+# Global staged request pipeline
+pipeline = None
+pipeline_lock = threading.Lock()
+
+def load_inference_stack():
+    """Import the heavy inference modules once (numpy, OpenCV; torch/ultralytics load with the model)"""
+    global cv2, np, PoseDetector, DetectionPipeline, ReplicaPool, binary_format, render
+    with inference_stack_lock:
+        if PoseDetector is not None:
+            return
+        import numpy as np
+        import cv2
+        import binary_format
+        import render
+        from pipeline import DetectionPipeline
+        from replica_pool import ReplicaPool
+        # Last, since it marks the stack as loaded
+        from pose_detector import PoseDetector
+
 def get_detector():
     """Get or initialize the pose detector"""
     global detector
     if detector is None:
-        print("Loading YOLO model...")
-        detector = PoseDetector(config.YOLO_MODEL, optimize_for_speed=True)
-        print("Model loaded successfully!")
+        load_inference_stack()
+        with detector_lock:
+            if detector is None:
+                if config.REPLICA_WORKERS > 0:
+                    # Replicas load the model; this process only keeps session state and draws
+                    pose_detector = PoseDetector(config.YOLO_MODEL, optimize_for_speed=True,
+                                                 load_model=False)
+                else:
+                    print("Loading YOLO model...")
+                    pose_detector = PoseDetector(config.YOLO_MODEL, optimize_for_speed=True)
+                    print("Model loaded successfully!")
+                start_controller(pose_detector)
+                detector = pose_detector
     return detector
 
+def start_controller(pose_detector):
+    """Start the adaptive operating point controller for the detector if enabled"""
+    global controller
+    if not config.ADAPTIVE_ENABLED:
+        return
+    if config.REPLICA_WORKERS > 0:
+        # Replicas run their own models in other processes
+        print("! Adaptive operating point is not supported with REPLICA_WORKERS, disabled")
+        return
+
+    def apply_operating_point(model, input_size):
+        pose_detector.set_operating_point(config.MODEL_OPTIONS[model], input_size)
+
+    controller = AdaptiveController(apply_operating_point,
+                                    start=(model_key(pose_detector.model_path), pose_detector.input_size))
+    point = controller.operating_point
+    if (config.MODEL_OPTIONS[point['model']], point['input_size']) != \
+            (pose_detector.model_path, pose_detector.input_size):
+        apply_operating_point(point['model'], point['input_size'])
+
+def warmup_operating_points(pose_detector):
+    """(model path, input size) pairs the service can run: the current one, ROI crops and the adaptive ladder"""
+    points = [(pose_detector.model_path, pose_detector.input_size),
+              (pose_detector.model_path, config.ROI_INPUT_SIZE)]
+    if controller is not None:
+        points += [(config.MODEL_OPTIONS[model], input_size) for model, input_size in config.ADAPTIVE_LADDER]
+    return points
+
+def model_key(model_path):
+    """Get the MODEL_OPTIONS key for a model path (the path itself if it is not listed)"""
+    for key, path in config.MODEL_OPTIONS.items():
+        if path == model_path:
+            return key
+    return model_path
+
+def get_operating_point():
+    """Get the model and input size new frames currently run at"""
+    if controller is not None:
+        return controller.operating_point
+    if detector is not None:
+        return {'model': model_key(detector.model_path), 'input_size': detector.input_size}
+    return {'model': model_key(config.YOLO_MODEL), 'input_size': config.INPUT_SIZE}
+
+def set_startup_stage(stage, error=None):
+    """Record background startup progress for /health"""
+    with startup_lock:
+        startup_state['stage'] = stage
+        startup_state['stage_times_s'][stage] = round(time.perf_counter() - _import_start, 3)
+        if error is not None:
+            startup_state['error'] = error
+
+def warm_up_service():
+    """Import the inference stack, load the model, run the warm-up passes and mark the service ready"""
+    global warmup_timings
+
+    set_startup_stage('importing')
+    load_inference_stack()
+
+    set_startup_stage('loading_model')
+    pose_detector = get_detector()
+
+    set_startup_stage('warming_up')
+    if config.REPLICA_WORKERS > 0:
+        # Replicas run inference and warm up their own models before reporting ready
+        get_replica_pool()
+    else:
+        print("Warming up model...")
+        warmup_timings = pose_detector.warmup(warmup_operating_points(pose_detector))
+        for combination, elapsed_ms in warmup_timings.items():
+            print(f"  {combination}: {elapsed_ms:.1f} ms")
+
+    set_startup_stage('ready')
+    ready_event.set()
+    print("Warm-up complete, service is ready")
+
+def start_background_startup():
+    """Load and warm up the inference stack on a background thread"""
+    def run():
+        try:
+            warm_up_service()
+        except Exception as e:
+            print(f"Error during startup: {e}")
+            set_startup_stage('failed', str(e))
+
+    set_startup_stage('starting')
+    thread = threading.Thread(target=run, name='pose-startup', daemon=True)
+    thread.start()
+    return thread
+
+def not_ready_response():
+    """
+    Get a 503 response while the background startup is still running (or failed)
+
+    Returns:
+        None when requests can be served
+    """
+    stage = startup_state['stage']
+    if stage in ('idle', 'ready'):
+        return None
+    response = jsonify({
+        'success': False,
+        'error': 'Model is still loading' if stage != 'failed' else 'Model failed to load',
+        'startup_stage': stage
+    })
+    response.headers['Retry-After'] = '1'
+    return response, 503
+
+def get_batcher():
+    """Get or start the micro-batching scheduler"""
+    global batcher
+    with batcher_lock:
+        if batcher is None:
+            batcher = MicroBatcher(get_detector())
+    return batcher
+
+def get_replica_pool():
+    """Get or start the multi-process replica pool"""
+    global replica_pool
+    load_inference_stack()
+    with replica_pool_lock:
+        if replica_pool is None:
+            print(f"Starting {config.REPLICA_WORKERS} model replicas...")
+            replica_pool = ReplicaPool(config.REPLICA_WORKERS)
+            atexit.register(replica_pool.close)
+    return replica_pool
+
+def get_inference_engine():
+    """Get whatever runs inference: the replica pool, the micro-batcher or the detector itself"""
+    if config.REPLICA_WORKERS > 0:
+        return get_replica_pool()
+    if config.ENABLE_MICRO_BATCHING:
+        return get_batcher()
+    return get_detector()
+
+def run_detection(image):
+    """Detect poses in a single image, batching with concurrent requests when enabled"""
+    return get_inference_engine().detect_poses(image)
+
+def detect_frame(image, session_id, track, roi, motion_gate):
+    """
+    Detect poses in one frame of a session (runs on the pipeline's inference stage)
+
+    Args:
+        image: Decoded frame
+        session_id: Stream the frame belongs to
+        track: Whether to use tracking mode
+        roi: Whether to refine poses on crops around the previous frame's people
+        motion_gate: Whether to reuse the last detections when the frame is static
+
+    Returns:
+        Tuple of (pose analysis results, whether they were reused from a previous frame)
+    """
+    pose_detector = get_detector()
+
+    # Full-frame detections go through the micro-batcher / replica pool; ROI
+    # mode and tracking each replace some of them with cheaper work
+    detect_fn = run_detection
+    if roi:
+        detect_fn = functools.partial(pose_detector.detect_poses_roi, session_id=session_id,
+                                      detect_fn=detect_fn, detect_many_fn=run_detection_many)
+    if track:
+        detect_fn = functools.partial(pose_detector.detect_poses_tracked, session_id=session_id,
+                                      detect_fn=detect_fn)
+
+    # Requests without a session_id all share DEFAULT_SESSION, so gating them would
+    # compare unrelated clients' frames and serialize them on one gate
+    if motion_gate and session_id != DEFAULT_SESSION:
+        return pose_detector.detect_poses_gated(image, session_id, detect_fn)
+    return detect_fn(image), False
+
+def result_cache_config_key():
+    """Everything besides the image that detection results depend on"""
+    return (
+        detector.model_path if detector is not None else config.YOLO_MODEL,
+        detector.backend if detector is not None else config.INFERENCE_BACKEND,
+        detector.input_size if detector is not None else config.INPUT_SIZE,
+        config.PERSON_CONFIDENCE_THRESHOLD,
+        config.POSE_CONFIDENCE_THRESHOLD,
+        config.ELBOW_SHOULDER_THRESHOLD,
+        config.HAND_ELBOW_THRESHOLD
+    )
+
+def detect_request_image(pipeline, data, session_id, track):
+    """
+    Decode and detect one frame, reusing cached results for repeated image payloads
+
+    Tracked and ROI results depend on the session's history, so those modes
+    bypass the result cache, and cache hits cannot render return_image.
+
+    Args:
+        pipeline: Staged request pipeline
+        data: Request options including the raw 'image' payload
+        session_id: Stream the frame belongs to
+        track: Whether to use tracking mode
+
+    Returns:
+        Tuple of (decoded image, or None on a cache hit, (width, height), pose results,
+        whether the results were reused), or None if the image could not be decoded
+    """
+    roi = data.get('roi', config.ROI_ENABLED)
+
+    cache_key = None
+    # Other payload types are left for decode_image to reject
+    if (result_cache is not None and not track and not roi
+            and isinstance(data['image'], (bytes, str))):
+        cache_key = ResultCache.key_for(data['image'], result_cache_config_key())
+        if not data.get('return_image', False):
+            hit = result_cache.get(cache_key)
+            if hit is not None:
+                pose_results, image_size = hit
+                return None, image_size, pose_results, True
+
+    image = pipeline.decode(decode_image, data['image'])
+    if image is None:
+        return None
+
+    inference_start = time.perf_counter()
+    pose_results, cached = pipeline.infer(detect_frame, image, session_id, track, roi,
+                                          data.get('motion_gate', config.MOTION_GATE_ENABLED))
+    image_size = (image.shape[1], image.shape[0])
+
+    # Feed the adaptive controller with frames that actually ran inference
+    if controller is not None and not cached:
+        controller.observe((time.perf_counter() - inference_start) * 1000,
+                           pipeline.stages['inference'].depth())
+
+    # Only results the model actually produced for these exact bytes are cached
+    if cache_key is not None and not cached:
+        result_cache.put(cache_key, (pose_results, image_size), estimate_size(pose_results))
+
+    return image, image_size, pose_results, cached
+
+def run_detection_many(images, input_size=None):
+    """Detect poses in several images, through the micro-batcher or replica pool when enabled"""
+    return get_inference_engine().detect_poses_many(images, input_size=input_size)
+
+def get_pipeline():
+    """Get or create the staged decode/inference/encode pipeline"""
+    global pipeline
+    load_inference_stack()
+    with pipeline_lock:
+        if pipeline is None:
+            if config.REPLICA_WORKERS > 0:
+                # Two dispatchers per replica so each has its next job queued
+                pipeline = DetectionPipeline(
+                    inference_workers=2 * config.REPLICA_WORKERS,
+                    inference_depth_provider=lambda: replica_pool.queue_depth() if replica_pool is not None else 0)
+            elif config.ENABLE_MICRO_BATCHING:
+                # The micro-batcher already is the single inference thread with its own queue
+                pipeline = DetectionPipeline(
+                    inference_workers=0,
+                    inference_depth_provider=lambda: batcher.queue_depth() if batcher is not None else 0)
+            else:
+                pipeline = DetectionPipeline(inference_workers=1)
+    return pipeline
+
+def get_batching_status():
+    """Get micro-batching configuration and, once started, scheduler statistics"""
+    status = {
+        'enabled': config.ENABLE_MICRO_BATCHING,
+        'max_batch_size': config.MICRO_BATCH_MAX_SIZE,
+        'max_wait_ms': config.MICRO_BATCH_WINDOW_MS
+    }
+    if batcher is not None:
+        status.update(batcher.stats())
+    return status
+
+# Request options that arrive as strings in query/form fields for binary uploads
+BOOLEAN_OPTIONS = ('return_image', 'return_images', 'draw_keypoints', 'track', 'roi', 'motion_gate')
+
+def parse_bool(value):
+    """Interpret a query/form string option as a boolean"""
+    if isinstance(value, str):
+        return value.strip().lower() in ('1', 'true', 'yes', 'on')
+    return bool(value)
+
+# Request options that arrive as strings and hold integers
+INTEGER_OPTIONS = ('preview_max_dim', 'image_quality')
+
+def parse_int_option(data, option, default):
+    """
+    Get an integer option
+
+    Raises:
+        ValueError: If the value is not an integer
+    """
+    value = data.get(option, default)
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f'{option} must be an integer, got {value!r}') from None
+
+def parse_options(data):
+    """
+    Convert string-valued boolean and integer options in place
+
+    Raises:
+        ValueError: For an integer option that is not an integer
+    """
+    for option in BOOLEAN_OPTIONS:
+        if option in data:
+            data[option] = parse_bool(data[option])
+    for option in INTEGER_OPTIONS:
+        if option in data:
+            data[option] = parse_int_option(data, option, None)
+    return data
+
+def preview_max_dim(data):
+    """
+    Longer side of the returned image (0 keeps the full resolution)
+
+    Raises:
+        ValueError: If preview_max_dim is not an integer
+    """
+    return max(0, parse_int_option(data, 'preview_max_dim', config.RENDER_PREVIEW_MAX_DIM) or 0)
+
+def get_request_data():
+    """
+    Get the request payload as a dict
+
+    JSON bodies are returned unchanged. Raw image bodies (application/octet-stream
+    or image/*) and multipart uploads are mapped to the same shape: the encoded
+    image bytes go under 'image' (first part) and 'images' (all parts, in order)
+    and options are read from the query string and form fields.
+
+    Raises:
+        ValueError: For an integer option that is not an integer
+    """
+    mimetype = request.mimetype
+    if mimetype == 'application/octet-stream' or mimetype.startswith('image/'):
+        images = [request.get_data()]
+    elif mimetype == 'multipart/form-data':
+        images = [part.read() for _, part in request.files.items(multi=True)]
+    else:
+        return request.get_json()
+
+    data = request.args.to_dict()
+    data.update(request.form.to_dict())
+    parse_options(data)
+
+    images = [image for image in images if image]
+    if images:
+        data['image'] = images[0]
+        data['images'] = images
+    return data
+
 def decode_image(image_data):
-    """Decode base64 image data to OpenCV image"""
+    """Decode base64 image data or raw JPEG/PNG bytes to OpenCV image"""
+    decode_start = time.perf_counter()
     try:
-        # Remove data URL prefix if present
-        if ',' in image_data:
-            image_data = image_data.split(',')[1]
+        if isinstance(image_data, (bytes, bytearray)):
+            img_data = image_data
+        else:
+            # Remove data URL prefix if present
+            if ',' in image_data:
+                image_data = image_data.split(',')[1]
 
-        # Decode base64
-        img_data = base64.b64decode(image_data)
+            # Decode base64
+            img_data = base64.b64decode(image_data)
 
-        # Convert to PIL Image
-        pil_image = Image.open(io.BytesIO(img_data))
-        
-        # Convert PIL to OpenCV format
-        opencv_image = cv2.cvtColor(np.array(pil_image), cv2.COLOR_RGB2BGR)
+        # Decode straight to BGR with a single decoder call
+        opencv_image = cv2.imdecode(np.frombuffer(img_data, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if opencv_image is None:
+            raise ValueError('unsupported or corrupt image data')
 
         return opencv_image
     except Exception as e:
         print(f"Error decoding image: {e}")
         return None
+    finally:
+        metrics.STAGE_SECONDS.observe(time.perf_counter() - decode_start, stage='decode')
+
+# Returned image encoders: format -> (file extension, MIME type, OpenCV quality flag)
+IMAGE_FORMATS = {
+    'jpeg': ('.jpg', 'image/jpeg', 'IMWRITE_JPEG_QUALITY'),
+    'webp': ('.webp', 'image/webp', 'IMWRITE_WEBP_QUALITY')
+}
+IMAGE_TRANSPORTS = ('inline', 'id', 'binary')
+
+# Image output settings of one request: format, quality and transport
+ImageOptions = namedtuple('ImageOptions', 'format quality transport')
+
+# Encoded response body; image_parts holds (bytes, MIME type) images sent
+# after the body with the "binary" image transport
+DetectionPayload = namedtuple('DetectionPayload', 'body mimetype image_parts')
+
+def image_output_options(data):
+    """
+    Get the validated image output options of a request
+
+    Raises:
+        ValueError: For an unknown format or transport, or a quality that is not
+                    an integer between 1 and 100
+    """
+    image_format = str(data.get('image_format', config.IMAGE_FORMAT)).lower()
+    image_format = 'jpeg' if image_format == 'jpg' else image_format
+    if image_format not in IMAGE_FORMATS:
+        raise ValueError(f"image_format must be one of {list(IMAGE_FORMATS)}")
+
+    quality = parse_int_option(data, 'image_quality', config.IMAGE_QUALITY)
+    if not 1 <= quality <= 100:
+        raise ValueError('image_quality must be between 1 and 100')
+
+    transport = str(data.get('image_transport', config.IMAGE_TRANSPORT)).lower()
+    if transport not in IMAGE_TRANSPORTS:
+        raise ValueError(f"image_transport must be one of {list(IMAGE_TRANSPORTS)}")
 
-def encode_image(image):
-    """Encode OpenCV image to base64"""
+    return ImageOptions(image_format, quality, transport)
+
+def encode_image_bytes(image, image_format='jpeg', quality=config.IMAGE_QUALITY):
+    """Encode an OpenCV (BGR) image straight to JPEG or WebP bytes"""
+    extension, _, quality_flag = IMAGE_FORMATS[image_format]
+    ok, buffer = cv2.imencode(extension, image, [getattr(cv2, quality_flag), int(quality)])
+    if not ok:
+        raise ValueError(f'could not encode image as {image_format}')
+    return buffer.tobytes()
+
+def encode_image(image, image_format='jpeg', quality=config.IMAGE_QUALITY):
+    """Encode OpenCV image to a base64 data URL"""
     try:
-        # Convert BGR to RGB
-        rgb_image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-        
-        # Convert to PIL Image
-        pil_image = Image.fromarray(rgb_image)
-        
-        # Save to bytes
-        img_buffer = io.BytesIO()
-        pil_image.save(img_buffer, format='JPEG', quality=85)
-        img_buffer.seek(0)
-        
-        # Encode to base64
-        img_base64 = base64.b64encode(img_buffer.getvalue()).decode('utf-8')
-        
-        return f"data:image/jpeg;base64,{img_base64}"
+        img_base64 = base64.b64encode(encode_image_bytes(image, image_format, quality)).decode('utf-8')
+        return f"data:{IMAGE_FORMATS[image_format][1]};base64,{img_base64}"
     except Exception as e:
         print(f"Error encoding image: {e}")
         return None
 
+def attach_image(target, image, image_options, image_parts):
+    """
+    Encode a returned image and reference it from a JSON result
+
+    Depending on the transport the image goes inline as a base64 data URL
+    ("processed_image"), into the image store ("processed_image_id" and
+    "processed_image_url"), or onto image_parts to be sent after the JSON
+    ("processed_image_part", counting the JSON as part 0).
+    """
+    image_bytes = encode_image_bytes(image, image_options.format, image_options.quality)
+    mimetype = IMAGE_FORMATS[image_options.format][1]
+
+    if image_options.transport == 'inline':
+        target['processed_image'] = f"data:{mimetype};base64,{base64.b64encode(image_bytes).decode('utf-8')}"
+    elif image_options.transport == 'id':
+        image_id = uuid.uuid4().hex
+        image_store.put(image_id, (image_bytes, mimetype), len(image_bytes))
+        target['processed_image_id'] = image_id
+        target['processed_image_url'] = f'/images/{image_id}'
+    else:
+        image_parts.append((image_bytes, mimetype))
+        target['processed_image_part'] = len(image_parts)
+
+def payload_response(payload):
+    """Wrap a detection payload in a response, as multipart/mixed when it carries image parts"""
+    if not payload.image_parts:
+        return Response(payload.body, mimetype=payload.mimetype)
+
+    boundary = uuid.uuid4().hex
+    chunks = [f'--{boundary}\r\nContent-Type: {payload.mimetype}\r\n\r\n'.encode('ascii'), payload.body]
+    for image_bytes, mimetype in payload.image_parts:
+        chunks.append(f'\r\n--{boundary}\r\nContent-Type: {mimetype}\r\n\r\n'.encode('ascii'))
+        chunks.append(image_bytes)
+    chunks.append(f'\r\n--{boundary}--\r\n'.encode('ascii'))
+    return Response(b''.join(chunks), content_type=f'multipart/mixed; boundary={boundary}')
+
+# COCO keypoint names in keypoint index order
+KEYPOINT_NAMES = sorted(config.KEYPOINTS, key=config.KEYPOINTS.get)
+
+def keypoint_rows(result):
+    """A person's keypoints as (name, [x, y, confidence]) pairs, from the raw array when present"""
+    raw = result.get('raw_keypoints')
+    if raw is None:
+        return result['keypoints'].items()
+    return zip(KEYPOINT_NAMES, np.asarray(raw, dtype=np.float64).reshape(-1, 3).tolist())
+
+def serialize_detections(pose_results):
+    """Convert pose analysis results into the JSON detection list"""
+    detections = []
+
+    for i, result in enumerate(pose_results):
+        detection = {
+            'person_id': int(result.get('person_id', i)) + 1,
+            'confidence': result.get('confidence', 0.0),
+            'target_pose_detected': result['target_pose_detected'],
+            'pose_analysis': {
+                'elbows_above_shoulders': result.get('elbows_above_shoulders', False),
+                'hands_above_elbows': result.get('hands_above_elbows', False),
+                'elbows_above_shoulders_and_hands_above_elbows': result.get('elbows_above_shoulders_and_hands_above_elbows', False)
+            },
+            'keypoints': {}
+        }
+
+        # Add keypoints with confidence scores
+        for point_name, coords in keypoint_rows(result):
+            if len(coords) >= 3:  # x, y, confidence
+                detection['keypoints'][point_name] = {
+                    'x': float(coords[0]),
+                    'y': float(coords[1]),
+                    'confidence': float(coords[2]),
+                    'visible': float(coords[2]) > config.POSE_CONFIDENCE_THRESHOLD
+                }
+
+        # Tracking mode: whether this person was propagated instead of detected
+        if 'tracked' in result:
+            detection['tracked'] = result['tracked']
+
+        # Motion gate: whether this detection was reused from the last inferred frame
+        if result.get('cached'):
+            detection['cached'] = True
+
+        # Add bounding box if available
+        if 'bbox' in result:
+            bbox = result['bbox']
+            detection['bbox'] = {
+                'x1': float(bbox[0]),
+                'y1': float(bbox[1]),
+                'x2': float(bbox[2]),
+                'y2': float(bbox[3]),
+                'width': float(bbox[2] - bbox[0]),
+                'height': float(bbox[3] - bbox[1])
+            }
+
+        detections.append(detection)
+
+    return detections
+
+def update_session_state(pose_detector, session_id, pose_results):
+    """Feed a frame's results into its session's temporal state"""
+    metrics.PEOPLE_DETECTED.inc(len(pose_results))
+    metrics.TARGET_POSES.inc(sum(1 for result in pose_results if result['target_pose_detected']))
+
+    confirmed = pose_detector.update_detection_state(pose_results, session_id)
+    return {
+        'id': session_id,
+        'consecutive_detections': pose_detector.get_consecutive_detections(session_id),
+        'target_pose_confirmed': confirmed,
+        'alert': confirmed and pose_detector.claim_alert(session_id)
+    }
+
+def build_detection_payload(pose_detector, image, pose_results, data, start_time, binary, extra_fields,
+                            image_size=None):
+    """
+    Build the response body for one frame (runs on the pipeline's encode stage)
+
+    Args:
+        pose_detector: Detector used for drawing
+        image: Decoded input image (None for cached results, without return_image)
+        pose_results: Pose analysis results for the image
+        data: Request options (return_image, draw_keypoints)
+        start_time: Request start time for processing_time_ms
+        binary: Whether to use the compact binary format
+        extra_fields: Additional JSON fields (e.g. session state)
+        image_size: (width, height) of the image (default: taken from image)
+
+    Returns:
+        DetectionPayload with the encoded body and any separately sent images
+    """
+    width, height = image_size or (image.shape[1], image.shape[0])
+
+    processed_image = None
+    if data.get('return_image', False) and image is not None:
+        processed_image = render_processed_image(pose_detector, image, pose_results,
+                                                 data.get('draw_keypoints', False), preview_max_dim(data))
+
+    encode_start = time.perf_counter()
+    try:
+        return encode_detection_payload(processed_image, pose_results, width, height,
+                                        start_time, binary, extra_fields, image_output_options(data))
+    finally:
+        metrics.STAGE_SECONDS.observe(time.perf_counter() - encode_start, stage='encoding')
+
+def encode_detection_payload(processed_image, pose_results, width, height, start_time, binary,
+                             extra_fields, image_options):
+    """Serialize one frame's results and optional rendered image to the response body"""
+    # Compact binary response if negotiated (the image is always appended to it)
+    if binary:
+        image_bytes = (encode_image_bytes(processed_image, image_options.format, image_options.quality)
+                       if processed_image is not None else None)
+        return DetectionPayload(binary_format.pack_detections(
+            pose_results, width, height, (time.time() - start_time) * 1000, image_bytes,
+            {'operating_point': get_operating_point(), **extra_fields}), binary_format.MIME_TYPE, [])
+
+    # Prepare response
+    response = {
+        'success': True,
+        'processing_time_ms': (time.time() - start_time) * 1000,
+        'people_detected': len(pose_results),
+        'image_dimensions': {
+            'width': width,
+            'height': height
+        },
+        'operating_point': get_operating_point(),
+        **extra_fields,
+        'detections': serialize_detections(pose_results)
+    }
+
+    # Add processed image if requested
+    image_parts = []
+    if processed_image is not None:
+        attach_image(response, processed_image, image_options, image_parts)
+
+    return DetectionPayload(json.dumps(response).encode('utf-8'), 'application/json', image_parts)
+
+def render_processed_image(pose_detector, image, pose_results, draw_keypoints, max_dim=0):
+    """
+    Get the image to return, optionally with detected poses drawn on it
+
+    The decoded image belongs to this request, so poses are drawn on it in
+    place; with max_dim they are drawn on a downscaled preview instead.
+    """
+    drawing_start = time.perf_counter()
+
+    if draw_keypoints:
+        # Draw keypoints and connections on image
+        processed_image = pose_detector.draw_poses(image, pose_results, max_dim=max_dim, in_place=True)
+    else:
+        processed_image = render.fit_to_max_dim(image, max_dim)[0]
+
+    metrics.STAGE_SECONDS.observe(time.perf_counter() - drawing_start, stage='drawing')
+    return processed_image
+
+def wants_binary_response(data):
+    """Check whether the client asked for the compact binary response format"""
+    response_format = data.get('format')
+    if response_format:
+        return response_format == 'binary'
+    best = request.accept_mimetypes.best_match(['application/json', binary_format.MIME_TYPE])
+    return best == binary_format.MIME_TYPE
+
 @app.route('/')
 def index():
     """API info endpoint"""
@@ -84,26 +770,92 @@ def index():
         'version': '1.0.0',
         'endpoints': {
             '/detect': 'POST - Detect poses in image',
-            '/health': 'GET - Health check',
+            '/detect_batch': 'POST - Detect poses in multiple images (batched inference)',
+            '/stream': 'WebSocket - Stream frames and receive results on one connection',
+            '/pipeline': 'GET - Pipeline stage queue depths and timings',
+            '/images/<id>': 'GET - Fetch a returned image sent with image_transport "id"',
+            '/metrics': 'GET - Prometheus metrics (per-stage latency, requests, errors)',
+            '/health': 'GET - Health check (liveness)',
+            '/ready': 'GET - Readiness check (503 until the model is warmed up)',
             '/config': 'GET - Get current configuration'
         }
     })
 
 @app.route('/health')
 def health():
-    """Health check endpoint"""
+    """Health check endpoint (liveness)"""
+    with startup_lock:
+        startup = {
+            'stage': startup_state['stage'],
+            'stage_times_s': dict(startup_state['stage_times_s']),
+            'error': startup_state['error']
+        }
     return jsonify({
         'status': 'healthy',
         'model_loaded': detector is not None,
+        'ready': ready_event.is_set(),
+        'startup': startup,
+        'import_time_ms': IMPORT_TIME_MS,
+        'import_time_budget_ms': config.IMPORT_TIME_BUDGET_MS,
         'timestamp': datetime.now().isoformat()
     })
 
+@app.route('/ready')
+def readiness():
+    """Readiness endpoint: 200 only after the model is loaded and warmed up"""
+    is_ready = ready_event.is_set()
+    return jsonify({
+        'ready': is_ready,
+        'warmup_ms': warmup_timings,
+        'timestamp': datetime.now().isoformat()
+    }), 200 if is_ready else 503
+
 @app.route('/config')
 def get_config():
     """Get current configuration"""
     return jsonify({
-        'model': config.YOLO_MODEL,
-        'input_size': config.INPUT_SIZE,
+        'model': detector.model_path if detector is not None else config.YOLO_MODEL,
+        'inference_backend': detector.backend if detector is not None else config.INFERENCE_BACKEND,
+        'inference_settings': detector.inference_settings if detector is not None else None,
+        'input_size': detector.input_size if detector is not None else config.INPUT_SIZE,
+        'operating_point': get_operating_point(),
+        'adaptive': controller.stats() if controller is not None else {'enabled': config.ADAPTIVE_ENABLED},
+        'max_batch_size': config.MAX_BATCH_SIZE,
+        'sessions': detector.sessions.stats() if detector is not None else {
+            'ttl_seconds': config.SESSION_TTL_SECONDS,
+            'max_sessions': config.SESSION_MAX_COUNT
+        },
+        'micro_batching': get_batching_status(),
+        'replica_pool': replica_pool.stats() if replica_pool is not None else {
+            'workers': config.REPLICA_WORKERS
+        },
+        'tracking': {
+            'enabled': config.TRACKING_ENABLED,
+            'stream_enabled': config.STREAM_TRACKING_ENABLED,
+            **(detector.tracking_stats() if detector is not None else {
+                'detect_interval': config.TRACKING_DETECT_INTERVAL
+            })
+        },
+        'roi': {
+            'enabled': config.ROI_ENABLED,
+            **(detector.roi_stats() if detector is not None else {
+                'input_size': config.ROI_INPUT_SIZE
+            })
+        },
+        'result_cache': result_cache.stats() if result_cache is not None else None,
+        'image_output': {
+            'format': config.IMAGE_FORMAT,
+            'quality': config.IMAGE_QUALITY,
+            'transport': config.IMAGE_TRANSPORT,
+            'preview_max_dim': config.RENDER_PREVIEW_MAX_DIM,
+            'store': image_store.stats()
+        },
+        'motion_gate': {
+            'enabled': config.MOTION_GATE_ENABLED,
+            **(detector.motion_gate_stats() if detector is not None else {
+                'threshold': config.MOTION_GATE_THRESHOLD
+            })
+        },
         'person_confidence_threshold': config.PERSON_CONFIDENCE_THRESHOLD,
         'pose_confidence_threshold': config.POSE_CONFIDENCE_THRESHOLD,
         'elbow_shoulder_threshold': config.ELBOW_SHOULDER_THRESHOLD,
@@ -120,97 +872,71 @@ def detect_poses():
     {
         "image": "data:image/jpeg;base64,/9j/4AAQSkZJRgABAQAAAQ...",
         "return_image": true,  // optional, default false
-        "draw_keypoints": true  // optional, default false
+        "draw_keypoints": true,  // optional, default false
+        "format": "binary",  // optional, "json" (default) or "binary"
+        "image_format": "webp",  // optional, returned image "jpeg" (default) or "webp"
+        "image_quality": 70,  // optional, returned image encoder quality (default 85)
+        "image_transport": "id",  // optional, "inline" base64 (default), "id" or "binary"
+        "session_id": "camera-1",  // optional, keys the temporal confirmation state
+        "track": true,  // optional, run the full model only every few frames of the session
+        "roi": true,  // optional, refine poses on crops around the session's previous people
+        "motion_gate": true  // optional, reuse the session's last detections while the frame is static (needs session_id)
     }
+
+    The compact binary format (see binary_format.py) is returned when
+    "format" is "binary" or the Accept header prefers
+    application/x-pose-detections; JSON stays the default.
+
+    Alternatively, send the raw JPEG/PNG bytes as the request body
+    (Content-Type: application/octet-stream or image/*) or as a multipart
+    file part, with options in the query string, e.g.
+    POST /detect?return_image=true&draw_keypoints=true
     """
+    unavailable = not_ready_response()
+    if unavailable:
+        return unavailable
+
     try:
         start_time = time.time()
         
-        # Get JSON data
-        data = request.get_json()
+        # Get JSON or binary upload data
+        try:
+            data = get_request_data()
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
         if not data or 'image' not in data:
             return jsonify({'error': 'No image data provided'}), 400
+        try:
+            image_output_options(data)
+            preview_max_dim(data)
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
 
-        # Decode image
-        image = decode_image(data['image'])
-        if image is None:
-            return jsonify({'error': 'Failed to decode image'}), 400
-
-        # Get options
-        return_image = data.get('return_image', False)
-        draw_keypoints = data.get('draw_keypoints', False)
+        pipeline = get_pipeline()
 
         # Get detector
         pose_detector = get_detector()
 
-        # Detect poses
-        pose_results = pose_detector.detect_poses(image)
-
-        # Prepare response
-        response = {
-            'success': True,
-            'processing_time_ms': (time.time() - start_time) * 1000,
-            'people_detected': len(pose_results),
-            'image_dimensions': {
-                'width': image.shape[1],
-                'height': image.shape[0]
-            },
-            'detections': []
-        }
-
-        # Process each detection
-        for i, result in enumerate(pose_results):
-            detection = {
-                'person_id': i + 1,
-                'confidence': result.get('confidence', 0.0),
-                'target_pose_detected': result['target_pose_detected'],
-                'pose_analysis': {
-                    'elbows_above_shoulders': result.get('elbows_above_shoulders', False),
-                    'hands_above_elbows': result.get('hands_above_elbows', False),
-                    'elbows_above_shoulders_and_hands_above_elbows': result.get('elbows_above_shoulders_and_hands_above_elbows', False)
-                },
-                'keypoints': {}
-            }
-
-            # Add keypoints with confidence scores
-            keypoints = result['keypoints']
-            for point_name, coords in keypoints.items():
-                if len(coords) >= 3:  # x, y, confidence
-                    detection['keypoints'][point_name] = {
-                        'x': float(coords[0]),
-                        'y': float(coords[1]),
-                        'confidence': float(coords[2]),
-                        'visible': float(coords[2]) > config.POSE_CONFIDENCE_THRESHOLD
-                    }
-
-            # Add bounding box if available
-            if 'bbox' in result:
-                bbox = result['bbox']
-                detection['bbox'] = {
-                    'x1': float(bbox[0]),
-                    'y1': float(bbox[1]),
-                    'x2': float(bbox[2]),
-                    'y2': float(bbox[3]),
-                    'width': float(bbox[2] - bbox[0]),
-                    'height': float(bbox[3] - bbox[1])
-                }
+        # Decode and detect poses (repeated payloads hit the result cache, static
+        # frames reuse the session's last detections, tracking mode runs the full
+        # model only every few frames)
+        session_id = str(data.get('session_id', DEFAULT_SESSION))
+        detection = detect_request_image(pipeline, data, session_id,
+                                         data.get('track', config.TRACKING_ENABLED))
+        if detection is None:
+            return jsonify({'error': 'Failed to decode image'}), 400
+        image, image_size, pose_results, cached = detection
 
-            response['detections'].append(detection)
+        # Update the stream's temporal confirmation state
+        session = update_session_state(pose_detector, session_id, pose_results)
 
-        # Add processed image if requested
-        if return_image:
-            processed_image = image.copy()
-            
-            if draw_keypoints:
-                # Draw keypoints and connections on image
-                processed_image = pose_detector.draw_poses(processed_image, pose_results)
-            
-            # Encode processed image
-            encoded_image = encode_image(processed_image)
-            if encoded_image:
-                response['processed_image'] = encoded_image
+        # Build the response body (JSON by default, compact binary if negotiated)
+        binary = wants_binary_response(data)
+        payload = pipeline.encode(build_detection_payload, pose_detector, image, pose_results,
+                                  data, start_time, binary, {'cached': cached, 'session': session},
+                                  image_size)
 
-        return jsonify(response)
+        return payload_response(payload)
 
     except Exception as e:
         print(f"Error in pose detection: {e}")
@@ -232,43 +958,74 @@ def detect_poses_batch():
             "data:image/jpeg;base64,/9j/4AAQSkZJRgABAQAAAQ..."
         ],
         "return_images": false,
-        "draw_keypoints": false
+        "draw_keypoints": false,
+        "session_id": "camera-1"  // optional, feeds images in order as consecutive frames
     }
+
+    Alternatively, send a multipart/form-data upload with one file part per
+    image (in order) and options in the query string or form fields.
     """
+    unavailable = not_ready_response()
+    if unavailable:
+        return unavailable
+
     try:
         start_time = time.time()
         
-        data = request.get_json()
+        try:
+            data = get_request_data()
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
         if not data or 'images' not in data:
             return jsonify({'error': 'No images data provided'}), 400
 
         images_data = data['images']
         if not isinstance(images_data, list) or len(images_data) == 0:
             return jsonify({'error': 'Images must be a non-empty list'}), 400
+        try:
+            image_options = image_output_options(data)
+            max_dim = preview_max_dim(data)
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
 
         return_images = data.get('return_images', False)
         draw_keypoints = data.get('draw_keypoints', False)
+        session_id = data.get('session_id')
+
+        pipeline = get_pipeline()
 
         # Get detector
         pose_detector = get_detector()
 
-        results = []
-        
-        for idx, image_data in enumerate(images_data):
-            try:
-                # Decode image
-                image = decode_image(image_data)
-                if image is None:
-                    results.append({
-                        'image_index': idx,
-                        'success': False,
-                        'error': 'Failed to decode image'
-                    })
-                    continue
-
-                # Detect poses
-                pose_results = pose_detector.detect_poses(image)
+        results = [None] * len(images_data)
+        decoded_indices = []
+        decoded_images = []
 
+        # Decode every image first (in parallel) so the model sees them as one batch
+        for idx, image in enumerate(pipeline.decode_many(decode_image, images_data)):
+            if image is None:
+                results[idx] = {
+                    'image_index': idx,
+                    'success': False,
+                    'error': 'Failed to decode image'
+                }
+                continue
+            decoded_indices.append(idx)
+            decoded_images.append(image)
+
+        # Detect poses for all decoded images in batched forward passes
+        batch_pose_results = pipeline.infer(run_detection_many, decoded_images) if decoded_images else []
+
+        # Images are treated as consecutive frames when a session is given
+        sessions = [None] * len(decoded_images)
+        if session_id is not None:
+            sessions = [update_session_state(pose_detector, str(session_id), pose_results)
+                        for pose_results in batch_pose_results]
+
+        def build_result(job):
+            idx, image, pose_results, session = job
+            image_parts = []
+            try:
                 # Prepare result for this image
                 result = {
                     'image_index': idx,
@@ -277,6 +1034,9 @@ def detect_poses_batch():
                     'detections': []
                 }
 
+                if session is not None:
+                    result['session'] = session
+
                 # Process detections (simplified for batch processing)
                 for i, pose_result in enumerate(pose_results):
                     detection = {
@@ -288,29 +1048,35 @@ def detect_poses_batch():
 
                 # Add processed image if requested
                 if return_images:
-                    processed_image = image.copy()
-                    if draw_keypoints:
-                        processed_image = pose_detector.draw_poses(processed_image, pose_results)
-                    
-                    encoded_image = encode_image(processed_image)
-                    if encoded_image:
-                        result['processed_image'] = encoded_image
+                    processed_image = render_processed_image(pose_detector, image, pose_results,
+                                                             draw_keypoints, max_dim)
+                    attach_image(result, processed_image, image_options, image_parts)
 
-                results.append(result)
+                return result, image_parts
 
             except Exception as e:
-                results.append({
+                return {
                     'image_index': idx,
                     'success': False,
                     'error': str(e)
-                })
+                }, []
 
-        return jsonify({
+        # Binary image parts follow the JSON in image order
+        all_image_parts = []
+        jobs = list(zip(decoded_indices, decoded_images, batch_pose_results, sessions))
+        for job, (result, image_parts) in zip(jobs, pipeline.encode_many(build_result, jobs)):
+            if image_parts:
+                all_image_parts.extend(image_parts)
+                result['processed_image_part'] = len(all_image_parts)
+            results[job[0]] = result
+
+        return payload_response(DetectionPayload(json.dumps({
             'success': True,
             'processing_time_ms': (time.time() - start_time) * 1000,
             'total_images': len(images_data),
+            'operating_point': get_operating_point(),
             'results': results
-        })
+        }).encode('utf-8'), 'application/json', all_image_parts))
 
     except Exception as e:
         print(f"Error in batch pose detection: {e}")
@@ -320,11 +1086,157 @@ def detect_poses_batch():
             'processing_time_ms': (time.time() - start_time) * 1000 if 'start_time' in locals() else 0
         }), 500
 
+@app.route('/pipeline')
+def pipeline_stats():
+    """Get queue depth and timings for each pipeline stage"""
+    return jsonify({
+        'stages': get_pipeline().stats(),
+        'micro_batching': get_batching_status(),
+        'replica_pool': replica_pool.stats() if replica_pool is not None else None,
+        'timestamp': datetime.now().isoformat()
+    })
+
+@app.route('/images/<image_id>')
+def get_image(image_id):
+    """Fetch a returned image stored with the "id" image transport"""
+    entry = image_store.get(image_id)
+    if entry is None:
+        return jsonify({'success': False, 'error': 'Image not found or expired'}), 404
+    image_bytes, mimetype = entry
+    return Response(image_bytes, mimetype=mimetype, headers={'Cache-Control': 'private, max-age=60'})
+
+@app.route('/metrics')
+def prometheus_metrics():
+    """Per-stage latency histograms, counters and gauges in Prometheus text format"""
+    if pipeline is not None:
+        for name, stage in pipeline.stages.items():
+            metrics.QUEUE_DEPTH.set(stage.depth(), stage=name)
+    if detector is not None:
+        metrics.MOTION_GATE_SKIP_RATIO.set(detector.motion_gate_stats()['skip_ratio'])
+    if result_cache is not None:
+        metrics.RESULT_CACHE_HIT_RATIO.set(result_cache.stats()['hit_ratio'])
+
+    return Response(metrics.REGISTRY.render(), content_type=metrics.CONTENT_TYPE)
+
+@sock.route('/stream')
+def stream_poses(ws):
+    """
+    Stream frames over a persistent WebSocket connection
+
+    Each client message is one frame: binary messages carry raw JPEG/PNG
+    bytes, text messages carry a JSON object like the /detect payload plus
+    an optional "frame_id" that is echoed back. Options for binary frames
+    come from the connection's query string, e.g. /stream?format=binary.
+    Each connection gets its own session state (pass ?session_id=... to
+    resume one). Tracking mode is on by default for streams
+    (config.STREAM_TRACKING_ENABLED, ?track=false to turn it off).
+
+    While a frame is being processed only the newest incoming frame is
+    kept and older ones are dropped, so results never lag behind the
+    camera. Each result is pushed back on the same connection; with
+    image_transport=binary the returned image follows it as a separate
+    binary message.
+    """
+    serve_stream(ws.receive, ws.send, request.args.to_dict())
+
+def serve_stream(receive, send, args):
+    """
+    Serve one /stream connection (shared by the flask-sock route and asgi.py)
+
+    Args:
+        receive: Blocking call returning the next client message (None when closed)
+        send: Sends one message (str as text, bytes as binary) to the client
+        args: Connection query string options
+    """
+    try:
+        options = parse_options(args)
+    except ValueError as e:
+        send(json.dumps({'success': False, 'error': str(e)}))
+        return
+    ephemeral_session = 'session_id' not in options
+    options.setdefault('session_id', uuid.uuid4().hex)
+
+    streaming.run_stream(receive, send,
+                         lambda message, stream_stats: process_stream_frame(message, options, stream_stats))
+
+    # Connection-scoped sessions are not resumable, so free them right away
+    if ephemeral_session and detector is not None:
+        detector.sessions.remove(options['session_id'])
+
+def process_stream_frame(message, options, stream_stats):
+    """Run detection on one streamed frame and build the message to push back"""
+    start_time = time.time()
+    data = dict(options)
+
+    metrics.REQUESTS.inc(endpoint='stream')
+    metrics.IN_FLIGHT.inc()
+    try:
+        return build_stream_message(message, data, start_time, stream_stats)
+    finally:
+        metrics.IN_FLIGHT.dec()
+        metrics.STAGE_SECONDS.observe(time.time() - start_time, stage='total')
+
+def build_stream_message(message, data, start_time, stream_stats):
+    """Detect poses in a streamed frame; errors are reported in the message instead of raised"""
+    try:
+        if isinstance(message, str):
+            data.update(parse_options(json.loads(message)))
+        else:
+            data['image'] = message
+
+        if 'image' not in data:
+            return json.dumps({'success': False, 'error': 'No image data provided', **stream_stats})
+
+        if startup_state['stage'] not in ('idle', 'ready'):
+            return json.dumps({'success': False, 'error': 'Model is still loading',
+                               'startup_stage': startup_state['stage'],
+                               'frame_id': data.get('frame_id'), **stream_stats})
+
+        pipeline = get_pipeline()
+
+        pose_detector = get_detector()
+        session_id = str(data['session_id'])
+        detection = detect_request_image(pipeline, data, session_id,
+                                         data.get('track', config.STREAM_TRACKING_ENABLED))
+        if detection is None:
+            return json.dumps({'success': False, 'error': 'Failed to decode image',
+                               'frame_id': data.get('frame_id'), **stream_stats})
+        image, image_size, pose_results, cached = detection
+        session = update_session_state(pose_detector, session_id, pose_results)
+
+        binary = data.get('format') == 'binary'
+        payload = pipeline.encode(build_detection_payload, pose_detector, image, pose_results,
+                                  data, start_time, binary,
+                                  {'frame_id': data.get('frame_id'), 'cached': cached,
+                                   'session': session, **stream_stats},
+                                  image_size)
+
+        # JSON results go out as text messages, binary results as binary messages;
+        # with the "binary" image transport the image follows as its own message
+        message = payload.body if binary else payload.body.decode('utf-8')
+        return [message] + [image_bytes for image_bytes, _ in payload.image_parts]
+
+    except Exception as e:
+        print(f"Error in stream pose detection: {e}")
+        metrics.ERRORS.inc(endpoint='stream')
+        return json.dumps({
+            'success': False,
+            'error': str(e),
+            'frame_id': data.get('frame_id'),
+            'processing_time_ms': (time.time() - start_time) * 1000,
+            **stream_stats
+        })
+
+# Import-time budget: the server must be able to bind quickly on restarts
+IMPORT_TIME_MS = (time.perf_counter() - _import_start) * 1000
+if IMPORT_TIME_MS > config.IMPORT_TIME_BUDGET_MS:
+    print(f"! pose_api import took {IMPORT_TIME_MS:.0f} ms "
+          f"(budget {config.IMPORT_TIME_BUDGET_MS} ms)")
+
 if __name__ == '__main__':
-    # Initialize detector on startup
+    # Load the model in the background so /, /health and /config answer right away
     print("Initializing YOLO pose detection API...")
-    get_detector()
-    print("API ready!")
+    start_background_startup()
 
     # Run the app
     port = int(5110)
@@ -334,7 +1246,11 @@ if __name__ == '__main__':
     print(f"API endpoints available at:")
     print(f"  http://localhost:{port}/")
     print(f"  http://localhost:{port}/detect")
+    print(f"  ws://localhost:{port}/stream")
     print(f"  http://localhost:{port}/health")
+    print(f"  http://localhost:{port}/ready")
     print(f"  http://localhost:{port}/config")
+    print(f"  http://localhost:{port}/pipeline")
+    print("Development server only; use 'python asgi.py' in production")
     
     app.run(host='0.0.0.0', port=port, debug=debug)
\ No newline at end of file
@@ -2,28 +2,292 @@
 YOLO-based pose detection system for detecting standing with raised arms
 """
 
+import os
+import shutil
 import cv2
 import numpy as np
-from ultralytics import YOLO
+import threading
 import time
-from typing import Optional, Tuple, List
+from typing import Callable, Optional, Tuple, List
 import config
+import metrics
+import preprocess
+import render
 import utils
+from motion_gate import MotionGate
+from roi import RoiState, best_match
+from tracking import PoseTracker
+from session_state import SessionStore, DEFAULT_SESSION
+
+
+# torch and ultralytics, imported by load_model_stack() when a model is first loaded,
+# so a detector that only keeps session state (replica mode) never pays for them
+torch = None
+YOLO = None
+
+
+def load_model_stack():
+    """Import torch and ultralytics once"""
+    global torch, YOLO
+    if YOLO is None:
+        import torch as torch_module
+        from ultralytics import YOLO as yolo_class
+        torch = torch_module
+        # Last, since it marks the stack as loaded
+        YOLO = yolo_class
+
+
+# Inference backends and the ultralytics export format each one runs from
+INFERENCE_BACKENDS = {
+    'torch': None,          # PyTorch .pt checkpoint
+    'onnx': 'onnx',         # ONNX Runtime (CPU)
+    'openvino': 'openvino'  # Intel OpenVINO (CPU)
+}
+
+
+def exported_model_path(model_path: str, backend: str, imgsz: int = config.INPUT_SIZE) -> str:
+    """
+    Get the cache location of a model exported for a non-torch backend
+
+    Args:
+        model_path: Path to the YOLO .pt model
+        backend: Inference backend name ('onnx' or 'openvino')
+        imgsz: Input size the model is exported at
+
+    Returns:
+        Path of the exported .onnx file or OpenVINO model directory
+    """
+    stem = os.path.splitext(os.path.basename(model_path))[0]
+    # ultralytics recognizes OpenVINO models by the _openvino_model directory suffix
+    suffix = '.onnx' if backend == 'onnx' else '_openvino_model'
+    return os.path.join(config.EXPORT_CACHE_DIR, f"{stem}_{imgsz}{suffix}")
+
+
+def configure_cpu_threads(intra_op_threads: Optional[int] = None,
+                          inter_op_threads: Optional[int] = None) -> dict:
+    """
+    Tune torch's CPU thread pools for this process
+
+    Args:
+        intra_op_threads: Threads per operator (default: config value, or the
+                          number of cores this process may run on)
+        inter_op_threads: Threads for running independent operators (default: config value)
+
+    Returns:
+        Dictionary with the effective thread counts
+    """
+    if intra_op_threads is None:
+        intra_op_threads = config.CPU_INTRA_OP_THREADS
+    if intra_op_threads is None:
+        intra_op_threads = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else os.cpu_count()
+    if inter_op_threads is None:
+        inter_op_threads = config.CPU_INTER_OP_THREADS
+
+    torch.set_num_threads(max(1, int(intra_op_threads or 1)))
+    try:
+        torch.set_num_interop_threads(max(1, int(inter_op_threads)))
+    except RuntimeError:
+        # Can only be set once, before any parallel work has started
+        pass
+
+    return {
+        'intra_op_threads': torch.get_num_threads(),
+        'inter_op_threads': torch.get_num_interop_threads()
+    }
+
+
+def warmup_frame() -> np.ndarray:
+    """
+    Get a frame with people in it, so warm-up also runs keypoint postprocessing
+
+    Uses config.WARMUP_IMAGE or the sample image bundled with ultralytics, and
+    fixed noise if neither can be read.
+    """
+    image_path = config.WARMUP_IMAGE
+    if image_path is None:
+        try:
+            from ultralytics.utils import ASSETS
+            image_path = ASSETS / 'bus.jpg'
+        except ImportError:
+            image_path = None
+
+    frame = cv2.imread(str(image_path)) if image_path is not None else None
+    if frame is None:
+        frame = np.random.default_rng(0).integers(0, 256, (480, 640, 3), dtype=np.uint8)
+    return frame
 
 
 class PoseDetector:
-    def __init__(self, model_path: str = config.YOLO_MODEL, optimize_for_speed: bool = True):
+    def __init__(self, model_path: str = config.YOLO_MODEL, optimize_for_speed: bool = True,
+                 backend: str = config.INFERENCE_BACKEND, load_model: bool = True):
         """
         Initialize the pose detector with YOLO model
 
         Args:
             model_path: Path to YOLO pose model
             optimize_for_speed: Whether to optimize for speed over accuracy
+            backend: Inference backend, one of INFERENCE_BACKENDS
+            load_model: Whether to load the model; without it the detector only keeps
+                        per-session state and draws results, and inference must come
+                        from detect_fn/detect_many_fn (e.g. a replica pool)
+        """
+        if backend not in INFERENCE_BACKENDS:
+            raise ValueError(f"Unknown inference backend '{backend}', "
+                             f"expected one of {list(INFERENCE_BACKENDS)}")
+        self.backend = backend
+        self.model_path = model_path
+        self.model = self._load_model(model_path) if load_model else None
+
+        # Loaded models by path, so switching operating points back and forth does not reload
+        self._models = {model_path: self.model} if load_model else {}
+        self._switch_lock = threading.Lock()
+        # Ultralytics predictors are not thread-safe: one model call at a time per detector
+        self._predict_lock = threading.Lock()
+
+        self.sessions = SessionStore()
+        self._tracking_lock = threading.Lock()
+        self.frames_detected = 0
+        self.frames_tracked = 0
+        self._motion_gate_lock = threading.Lock()
+        self.frames_gated = 0
+        self.frames_skipped = 0
+        self._roi_lock = threading.Lock()
+        self.frames_full = 0
+        self.frames_cropped = 0
+        self.optimize_for_speed = optimize_for_speed
+        self.input_size = config.INPUT_SIZE if optimize_for_speed else 640
+        self.use_half = False
+        if load_model:
+            self.device = 'cuda' if torch.cuda.is_available() else 'cpu'
+            self.inference_settings = self._configure_inference()
+        else:
+            # No inference in this process: leave torch unimported and its thread pools alone
+            self.device = None
+            self.inference_settings = {'device': None, 'backend': self.backend, 'model_loaded': False}
+
+    def _load_model(self, model_path: str) -> 'YOLO':
+        """Load a model for this detector's backend, exporting it once if needed"""
+        load_model_stack()
+        # Reuse a previously exported artifact without touching the .pt checkpoint
+        export_path = exported_model_path(model_path, self.backend) if self.backend != 'torch' else None
+        if export_path and os.path.exists(export_path):
+            model = YOLO(export_path, task='pose')
+            print(f"✓ Loaded cached {self.backend} model: {export_path}")
+            return model
+
+        model = self._load_torch_model(model_path)
+        if export_path:
+            model = self._export_model(model, model_path, export_path)
+        return model
+
+    def set_operating_point(self, model_path: str, input_size: int):
+        """
+        Switch the model and/or input size used for new inference calls
+
+        In-flight calls finish on the model they started with. The model and
+        input size are swapped together under the predict lock, so no call
+        sees one without the other. Sessions and other per-stream state are kept.
+
+        Args:
+            model_path: YOLO pose model (loaded and optimized on first use)
+            input_size: Model input size
+        """
+        with self._switch_lock:
+            model = self._get_model(model_path)
+            with self._predict_lock:
+                self.model = model
+                self.model_path = model_path
+                self.input_size = input_size
+
+    def _get_model(self, model_path: str) -> 'YOLO':
+        """Get a loaded model by path, loading and optimizing it on first use (call with _switch_lock held)"""
+        model = self._models.get(model_path)
+        if model is None:
+            model = self._load_model(model_path)
+            if self.optimize_for_speed and self.backend == 'torch':
+                self._optimize_model(model)
+            self._models[model_path] = model
+        return model
+
+    def _configure_inference(self) -> dict:
         """
-        # Load YOLO model - handle PyTorch security changes
-        import torch
-        import os
+        Set up device-aware inference optimizations
 
+        GPUs get half precision. CPUs keep fp32 (fp16 is slow or unsupported
+        there) and instead get tuned thread pools, channels-last memory format
+        and optionally a compiled model graph.
+
+        Returns:
+            Dictionary describing the chosen settings
+        """
+        settings = {
+            'device': self.device,
+            'backend': self.backend,
+            'half_precision': False
+        }
+
+        if self.device == 'cpu':
+            settings.update(configure_cpu_threads())
+
+        # Exported backends are optimized at export time
+        if self.model is None or not (self.optimize_for_speed and self.backend == 'torch'):
+            return settings
+
+        settings.update(self._optimize_model(self.model))
+        return settings
+
+    def _optimize_model(self, model: 'YOLO') -> dict:
+        """
+        Apply the device-specific optimizations to a loaded torch model
+
+        Returns:
+            Dictionary describing the applied optimizations
+        """
+        settings = {}
+
+        # Set model to evaluation mode for faster inference
+        model.model.eval()
+
+        if self.device == 'cuda':
+            # Half precision is faster on modern GPUs
+            try:
+                model.model.half()
+                self.use_half = True
+                print("✓ Using half precision for faster inference")
+            except Exception:
+                self.use_half = False
+                print("! Half precision not available, using full precision")
+            settings['half_precision'] = self.use_half
+            return settings
+
+        # CPU: convolution kernels can be faster on NHWC tensors. Fuse conv+BN first:
+        # fusion reshapes the conv weights with view(), which fails on channels-last
+        # weights, and replaces the convs, which would drop the memory format anyway
+        settings['channels_last'] = False
+        if config.CPU_CHANNELS_LAST:
+            try:
+                if hasattr(model.model, 'fuse'):
+                    model.model.fuse(verbose=False)
+                model.model.to(memory_format=torch.channels_last)
+                settings['channels_last'] = True
+                print("✓ Using channels-last memory format")
+            except Exception as e:
+                print(f"! Channels-last memory format not available: {e}")
+
+        # Optionally compile the forward pass (compiled lazily on the first call)
+        settings['compiled'] = False
+        if config.TORCH_COMPILE:
+            try:
+                model.model.forward = torch.compile(model.model.forward)
+                settings['compiled'] = True
+                print("✓ Compiling model graph with torch.compile")
+            except Exception as e:
+                print(f"! torch.compile not available: {e}")
+
+        return settings
+
+    def _load_torch_model(self, model_path: str) -> 'YOLO':
+        """Load the YOLO .pt checkpoint - handle PyTorch security changes"""
         # Check if model file exists, if not YOLO will download it
         if not os.path.exists(model_path):
             print(f"Model {model_path} not found, YOLO will download it...")
@@ -36,32 +300,38 @@ class PoseDetector:
 
         try:
             torch.load = patched_load
-            self.model = YOLO(model_path)
+            model = YOLO(model_path)
             print(f"✓ Successfully loaded YOLO model: {model_path}")
+            return model
         except Exception as e:
             print(f"Error loading model {model_path}: {e}")
             raise
         finally:
             # Restore original torch.load
             torch.load = original_load
-        self.consecutive_detections = 0
-        self.last_alert_time = 0
-        self.detection_history = []
-        self.optimize_for_speed = optimize_for_speed
 
-        # Performance optimizations
-        if optimize_for_speed:
-            # Set model to evaluation mode for faster inference
-            self.model.model.eval()
+    def _export_model(self, model: 'YOLO', model_path: str, export_path: str) -> 'YOLO':
+        """
+        Export a loaded torch model for the configured backend and cache it on disk
 
-            # Try to use half precision if available (faster on modern GPUs)
-            try:
-                self.model.model.half()
-                self.use_half = True
-                print("✓ Using half precision for faster inference")
-            except:
-                self.use_half = False
-                print("! Half precision not available, using full precision")
+        Args:
+            model: Loaded torch model
+            model_path: Path of the .pt checkpoint it was loaded from
+            export_path: Cache location from exported_model_path
+
+        Returns:
+            YOLO model running on the exported artifact
+        """
+        print(f"Exporting {model_path} for {self.backend} backend (one-time)...")
+        # Dynamic axes so batched calls and other input sizes work with one export
+        exported = model.export(format=INFERENCE_BACKENDS[self.backend], imgsz=config.INPUT_SIZE,
+                                     dynamic=True, half=False, verbose=False)
+
+        os.makedirs(os.path.dirname(export_path) or '.', exist_ok=True)
+        shutil.move(str(exported), export_path)
+        print(f"✓ Exported {self.backend} model to {export_path}")
+
+        return YOLO(export_path, task='pose')
 
     def detect_poses(self, frame: np.ndarray) -> List[dict]:
         """
@@ -73,291 +343,502 @@ class PoseDetector:
         Returns:
             List of pose analysis results
         """
-        # Resize frame for faster processing if optimization is enabled
-        original_frame = frame
-        if self.optimize_for_speed and config.INPUT_SIZE < frame.shape[1]:
-            # Calculate new dimensions maintaining aspect ratio
-            height, width = frame.shape[:2]
-            scale = config.INPUT_SIZE / max(width, height)
-            new_width = int(width * scale)
-            new_height = int(height * scale)
-            frame = cv2.resize(frame, (new_width, new_height))
+        return self.detect_poses_many([frame])[0]
+
+    def detect_poses_many(self, frames: List[np.ndarray],
+                          max_batch_size: Optional[int] = None,
+                          input_size: Optional[int] = None) -> List[List[dict]]:
+        """
+        Detect poses in several frames with batched YOLO forward passes
+
+        Args:
+            frames: Input image frames (may differ in size)
+            max_batch_size: Maximum frames per model call (default: config.MAX_BATCH_SIZE)
+            input_size: Model input size (default: self.input_size)
+
+        Returns:
+            One list of pose analysis results per input frame, in input order
+        """
+        # One model/input size for the whole call, even if the operating point changes meanwhile
+        with self._predict_lock:
+            model = self.model
+            if input_size is None:
+                input_size = self.input_size
+        return self._detect_with_model(model, frames, max_batch_size, input_size)
+
+    def _detect_with_model(self, model: 'YOLO', frames: List[np.ndarray],
+                           max_batch_size: Optional[int], input_size: int) -> List[List[dict]]:
+        """Run detect_poses_many on a given model and input size"""
+        if max_batch_size is None:
+            max_batch_size = config.MAX_BATCH_SIZE
+        max_batch_size = max(1, int(max_batch_size))
+
+        all_results = []
+        for start in range(0, len(frames), max_batch_size):
+            chunk = frames[start:start + max_batch_size]
+
+            # One resize+pad per frame; YOLO then sees inputs already at imgsz
+            preprocess_start = time.perf_counter()
+            images, transforms = preprocess.letterbox_batch(chunk, input_size)
+            preprocess_end = time.perf_counter()
+
+            with self._predict_lock, torch.inference_mode():
+                inference_start = time.perf_counter()
+                results = model.predict(images, **self._predict_params(input_size))
+
+            # YOLO returns one result per source image, in source order
+            analysis_start = time.perf_counter()
+            for result, transform in zip(results, transforms):
+                all_results.append(self._build_pose_results(result, transform))
+            analysis_end = time.perf_counter()
+
+            # Per model call (one batch)
+            metrics.STAGE_SECONDS.observe(preprocess_end - preprocess_start, stage='preprocess')
+            metrics.STAGE_SECONDS.observe(analysis_start - inference_start, stage='inference')
+            metrics.STAGE_SECONDS.observe(analysis_end - analysis_start, stage='analysis')
+
+        return all_results
+
+    def warmup(self, operating_points: Optional[List[Tuple[str, int]]] = None,
+               batch_sizes: Optional[List[int]] = None,
+               iterations: int = config.WARMUP_ITERATIONS) -> dict:
+        """
+        Run a frame with people through the detector so the first real request
+        does not pay for graph setup, allocator growth and kernel selection
+
+        Frames are letterboxed to the model input size, so what needs warming
+        is each (model, input size) in use, not each frame resolution.
+
+        Args:
+            operating_points: (model path, input size) pairs to warm up (default: the
+                              current model at its input size and at config.ROI_INPUT_SIZE)
+            batch_sizes: Batch sizes to warm up for each operating point
+            iterations: Passes per (operating point, batch size) combination
+
+        Returns:
+            Dictionary with the warm-up time in ms for each combination
+        """
+        if operating_points is None:
+            operating_points = [(self.model_path, self.input_size), (self.model_path, config.ROI_INPUT_SIZE)]
+        if batch_sizes is None:
+            batch_sizes = config.WARMUP_BATCH_SIZES
+
+        frame = warmup_frame()
+        timings = {}
+        for model_path, input_size in dict.fromkeys(operating_points):
+            with self._switch_lock:
+                model = self._get_model(model_path)
+            for batch_size in batch_sizes:
+                start = time.time()
+                for _ in range(iterations):
+                    self._detect_with_model(model, [frame] * batch_size, batch_size, input_size)
+                timings[f"{os.path.basename(model_path)}@{input_size}x{batch_size}"] = (time.time() - start) * 1000
+
+        return timings
+
+    def detect_poses_tracked(self, frame: np.ndarray, session_id: str = DEFAULT_SESSION,
+                             detect_fn: Optional[Callable[[np.ndarray], List[dict]]] = None) -> List[dict]:
+        """
+        Detect poses with the full model every few frames and track people in between
+
+        The full model runs every config.TRACKING_DETECT_INTERVAL frames of a
+        session, or sooner when optical flow loses too many keypoints. Other
+        frames reuse the last detection moved along with the image. Every
+        result gets a stable person_id and a 'tracked' flag (False when the
+        full model ran on this frame).
+
+        Args:
+            frame: Input image frame (frames of one session must arrive in order)
+            session_id: Stream whose tracker to use
+            detect_fn: Full detection for one frame (default: self.detect_poses),
+                       e.g. to go through the micro-batcher
+
+        Returns:
+            List of pose analysis results
+        """
+        state = self.sessions.get(session_id)
+        with state.lock:
+            if state.tracker is None:
+                state.tracker = PoseTracker()
+            tracker = state.tracker
+
+        with tracker.lock:
+            if tracker.needs_detection(frame):
+                pose_results = (detect_fn or self.detect_poses)(frame)
+                keypoints = np.array([result['raw_keypoints'] for result in pose_results],
+                                     dtype=np.float32).reshape(-1, 17, 3)
+                bboxes = None
+                if all('bbox' in result for result in pose_results):
+                    bboxes = np.array([result['bbox'] for result in pose_results],
+                                      dtype=np.float32).reshape(-1, 4)
+                confidences = np.array([result['confidence'] for result in pose_results], dtype=np.float32)
+
+                ids = tracker.update(frame, keypoints, bboxes, confidences)
+                for result, person_id in zip(pose_results, ids):
+                    result['person_id'] = int(person_id)
+                    result['tracked'] = False
+                tracked = False
+            else:
+                pose_results = self._pose_results_from_arrays(*tracker.propagate(frame))
+                for result in pose_results:
+                    result['tracked'] = True
+                tracked = True
+
+        with self._tracking_lock:
+            if tracked:
+                self.frames_tracked += 1
+            else:
+                self.frames_detected += 1
+
+        return pose_results
 
+    def tracking_stats(self) -> dict:
+        """Get how many tracked-mode frames ran the full model versus optical flow"""
+        with self._tracking_lock:
+            total = self.frames_detected + self.frames_tracked
+            return {
+                'detect_interval': config.TRACKING_DETECT_INTERVAL,
+                'min_quality': config.TRACKING_MIN_QUALITY,
+                'frames_detected': self.frames_detected,
+                'frames_tracked': self.frames_tracked,
+                'inference_ratio': self.frames_detected / total if total else 0.0
+            }
+
+    def detect_poses_gated(self, frame: np.ndarray, session_id: str = DEFAULT_SESSION,
+                           detect_fn: Optional[Callable[[np.ndarray], List[dict]]] = None
+                           ) -> Tuple[List[dict], bool]:
+        """
+        Skip detection when a session's frame barely differs from its last inferred frame
+
+        Args:
+            frame: Input image frame
+            session_id: Stream whose motion gate to use
+            detect_fn: Detection for frames with motion (default: self.detect_poses),
+                       e.g. tracked detection or the micro-batcher
+
+        Returns:
+            Tuple of (pose analysis results, whether they were reused from the last inferred frame)
+        """
+        state = self.sessions.get(session_id)
+        with state.lock:
+            if state.motion_gate is None:
+                state.motion_gate = MotionGate()
+            gate = state.motion_gate
+
+        thumbnail = gate.thumbnail(frame)
+        with gate.lock:
+            pose_results = gate.cached_results(frame, thumbnail)
+        cached = pose_results is not None
+
+        # Inference runs outside the gate lock so concurrent frames of a session
+        # can still be batched together; the last one to finish becomes the reference
+        if not cached:
+            pose_results = (detect_fn or self.detect_poses)(frame)
+            with gate.lock:
+                gate.store(frame, thumbnail, pose_results)
+
+        with self._motion_gate_lock:
+            self.frames_gated += 1
+            self.frames_skipped += cached
+
+        return pose_results, cached
+
+    def motion_gate_stats(self) -> dict:
+        """Get how many gated frames reused cached detections instead of running inference"""
+        with self._motion_gate_lock:
+            return {
+                'threshold': config.MOTION_GATE_THRESHOLD,
+                'frames_checked': self.frames_gated,
+                'frames_skipped': self.frames_skipped,
+                'skip_ratio': self.frames_skipped / self.frames_gated if self.frames_gated else 0.0
+            }
+
+    def detect_poses_roi(self, frame: np.ndarray, session_id: str = DEFAULT_SESSION,
+                         detect_fn: Optional[Callable[[np.ndarray], List[dict]]] = None,
+                         detect_many_fn: Optional[Callable[[List[np.ndarray], int], List[List[dict]]]] = None
+                         ) -> List[dict]:
+        """
+        Refine poses on padded crops around the people found in the previous frame
+
+        All crops go through the model in one batch at config.ROI_INPUT_SIZE,
+        so people who are small in a wide frame get more pixels per keypoint
+        for less compute than the full frame. The full frame is used instead
+        every config.ROI_FULL_FRAME_INTERVAL frames (so people entering are
+        found), after a crop lost its person, and when the crops would
+        cover most of the frame.
+
+        Args:
+            frame: Input image frame (frames of one session must arrive in order)
+            session_id: Stream whose previous boxes to use
+            detect_fn: Full-frame detection (default: self.detect_poses)
+            detect_many_fn: Batched detection of the crops at a given input size
+                            (default: self.detect_poses_many), e.g. the micro-batcher
+
+        Returns:
+            List of pose analysis results
+        """
+        state = self.sessions.get(session_id)
+        with state.lock:
+            if state.roi is None:
+                state.roi = RoiState()
+            roi = state.roi
+
+        with roi.lock:
+            regions = roi.regions_for(frame)
+            if regions is None:
+                pose_results = (detect_fn or self.detect_poses)(frame)
+                roi.update(frame, [result['bbox'] for result in pose_results if 'bbox' in result],
+                           full_frame=True)
+                cropped = False
+            else:
+                pose_results, lost_person = self._detect_in_regions(frame, regions, roi.bboxes,
+                                                                    detect_many_fn)
+                roi.update(frame, [result['bbox'] for result in pose_results], full_frame=False,
+                           lost_person=lost_person)
+                cropped = True
+
+        with self._roi_lock:
+            if cropped:
+                self.frames_cropped += 1
+            else:
+                self.frames_full += 1
+
+        return pose_results
+
+    def _detect_in_regions(self, frame: np.ndarray, regions: List[Tuple[int, int, int, int]],
+                           previous_bboxes: np.ndarray,
+                           detect_many_fn: Optional[Callable[[List[np.ndarray], int], List[List[dict]]]] = None
+                           ) -> Tuple[List[dict], bool]:
+        """
+        Run pose on all crop regions in one batch and map the results back to the frame
+
+        Each crop keeps the detection overlapping its previous box most, so a
+        neighbour reaching into the crop is not reported twice.
+
+        Returns:
+            Tuple of (pose analysis results, whether any crop lost its person)
+        """
+        crops = [frame[y1:y2, x1:x2] for x1, y1, x2, y2 in regions]
+        if detect_many_fn is None:
+            crop_results = self.detect_poses_many(crops, max_batch_size=len(crops),
+                                                  input_size=config.ROI_INPUT_SIZE)
+        else:
+            crop_results = detect_many_fn(crops, config.ROI_INPUT_SIZE)
+
+        keypoints, bboxes, confidences = [], [], []
+        for (x1, y1, _, _), results, previous in zip(regions, crop_results, previous_bboxes):
+            results = [result for result in results if 'bbox' in result]
+            offset = np.array([x1, y1, x1, y1], dtype=np.float32)
+            index = best_match(np.array([result['bbox'] for result in results], dtype=np.float32).reshape(-1, 4),
+                               previous - offset)
+            if index is None:
+                continue
+
+            person_keypoints = np.array(results[index]['raw_keypoints'], dtype=np.float32)
+            person_keypoints[:, :2] += offset[:2]
+            keypoints.append(person_keypoints)
+            bboxes.append(np.asarray(results[index]['bbox'], dtype=np.float32) + offset)
+            confidences.append(results[index]['confidence'])
+
+        lost_person = len(keypoints) < len(regions)
+        if not keypoints:
+            return [], lost_person
+
+        return self._pose_results_from_arrays(np.stack(keypoints), np.stack(bboxes),
+                                              np.array(confidences, dtype=np.float32), None), lost_person
+
+    def roi_stats(self) -> dict:
+        """Get how many ROI-mode frames ran on crops versus the full frame"""
+        with self._roi_lock:
+            total = self.frames_full + self.frames_cropped
+            return {
+                'input_size': config.ROI_INPUT_SIZE,
+                'full_frame_interval': config.ROI_FULL_FRAME_INTERVAL,
+                'frames_full': self.frames_full,
+                'frames_cropped': self.frames_cropped,
+                'cropped_ratio': self.frames_cropped / total if total else 0.0
+            }
+
+    def _predict_params(self, input_size: Optional[int] = None) -> dict:
+        """Build the keyword arguments for YOLO predict"""
         # Run YOLO inference using predict method with speed optimizations
         predict_params = {
             'conf': config.PERSON_CONFIDENCE_THRESHOLD,
             'verbose': False,
             'save': False,
             'show': False,
-            'imgsz': config.INPUT_SIZE if self.optimize_for_speed else 640,
+            'imgsz': input_size or self.input_size,
         }
 
         # Add half precision if available
         if self.optimize_for_speed and hasattr(self, 'use_half') and self.use_half:
             predict_params['half'] = True
 
-        results = self.model.predict(frame, **predict_params)
+        return predict_params
+
+    def _build_pose_results(self, result, transform: preprocess.LetterboxTransform) -> List[dict]:
+        """
+        Convert one YOLO result into pose analysis results
+
+        Args:
+            result: YOLO result for a single letterboxed image
+            transform: Letterbox transform mapping coordinates back to the original frame
+
+        Returns:
+            List of pose analysis results
+        """
+        if result.keypoints is None or len(result.keypoints.data) == 0:
+            return []
+
+        # All people's keypoints as one (N_people, 17, 3) array
+        all_keypoints = result.keypoints.data.cpu().numpy().copy()
+
+        # Map keypoints back to original frame coordinates, confidence unchanged
+        transform.points_to_frame(all_keypoints)
+
+        # Bounding boxes, confidences and tracker ids for all people at once
+        bboxes = confidences = track_ids = None
+        if result.boxes is not None and len(result.boxes) > 0:
+            bboxes = result.boxes.xyxy.cpu().numpy().copy()
+            confidences = result.boxes.conf.cpu().numpy()
+            if getattr(result.boxes, 'id', None) is not None:
+                track_ids = result.boxes.id.cpu().numpy()
+
+            # Map bounding boxes back to original frame coordinates
+            transform.boxes_to_frame(bboxes)
+
+        return self._pose_results_from_arrays(all_keypoints, bboxes, confidences, track_ids)
+
+    def _pose_results_from_arrays(self, all_keypoints: np.ndarray, bboxes: Optional[np.ndarray],
+                                  confidences: Optional[np.ndarray],
+                                  track_ids: Optional[np.ndarray]) -> List[dict]:
+        """
+        Analyze poses and build result dicts from per-person arrays
+
+        Args:
+            all_keypoints: (N, 17, 3) keypoints in frame coordinates
+            bboxes: (N, 4) xyxy boxes, or None
+            confidences: (N,) person confidences, or None
+            track_ids: (N,) person ids, or None to number people by index
+
+        Returns:
+            List of pose analysis results
+        """
+        # Analyze every person's pose in one vectorized pass
+        flags = utils.analyze_poses_array(all_keypoints)
 
         pose_results = []
+        for i, keypoints_array in enumerate(all_keypoints):
+            target_pose = bool(flags['target_pose_detected'][i])
+            analysis = {
+                'standing': bool(flags['standing'][i]),
+                'arms_raised': bool(flags['arms_raised'][i]),
+                'target_pose_detected': target_pose,
+                'elbows_above_shoulders_and_hands_above_elbows': target_pose
+            }
+
+            # Add bounding box info if available
+            if bboxes is not None and i < len(bboxes):
+                analysis['bbox'] = bboxes[i]
+                analysis['confidence'] = float(confidences[i])
+
+                # Add person ID for tracking (if available)
+                analysis['person_id'] = int(track_ids[i]) if track_ids is not None else i
+            else:
+                analysis['person_id'] = i
+                analysis['confidence'] = 0.5
+
+            # (17, 3) keypoints stay an array; per-keypoint dicts are only built when serializing
+            analysis['raw_keypoints'] = keypoints_array
 
-        # Calculate scale factor for keypoint adjustment if frame was resized
-        scale_x = scale_y = 1.0
-        if self.optimize_for_speed and config.INPUT_SIZE < original_frame.shape[1]:
-            original_height, original_width = original_frame.shape[:2]
-            current_height, current_width = frame.shape[:2]
-            scale_x = original_width / current_width
-            scale_y = original_height / current_height
-
-        for result in results:
-            if result.keypoints is not None and len(result.keypoints.data) > 0:
-                # Process each detected person
-                for i, keypoints_data in enumerate(result.keypoints.data):
-                    # Extract keypoints
-                    keypoints_array = keypoints_data.cpu().numpy()
-
-                    # Scale keypoints back to original frame size if needed
-                    if scale_x != 1.0 or scale_y != 1.0:
-                        # Scale x and y coordinates, keep confidence unchanged
-                        for j in range(0, len(keypoints_array), 3):
-                            if j + 1 < len(keypoints_array):
-                                keypoints_array[j] *= scale_x      # x coordinate
-                                keypoints_array[j + 1] *= scale_y  # y coordinate
-                                # keypoints_array[j + 2] remains unchanged (confidence)
-
-                    keypoints = utils.extract_keypoints(keypoints_array)
-
-                    # Analyze pose
-                    analysis = utils.analyze_pose(keypoints)
-
-                    # Add bounding box info if available
-                    if result.boxes is not None and i < len(result.boxes):
-                        box = result.boxes[i]
-                        bbox = box.xyxy[0].cpu().numpy()
-
-                        # Scale bounding box back to original size if needed
-                        if scale_x != 1.0 or scale_y != 1.0:
-                            bbox[0] *= scale_x  # x1
-                            bbox[1] *= scale_y  # y1
-                            bbox[2] *= scale_x  # x2
-                            bbox[3] *= scale_y  # y2
-
-                        analysis['bbox'] = bbox
-                        analysis['confidence'] = float(box.conf[0].cpu().numpy())
-
-                        # Add person ID for tracking (if available)
-                        if hasattr(box, 'id') and box.id is not None:
-                            analysis['person_id'] = int(box.id[0].cpu().numpy())
-                        else:
-                            analysis['person_id'] = i
-                    else:
-                        analysis['person_id'] = i
-                        analysis['confidence'] = 0.5
-
-                    # Add raw keypoints for advanced visualization
-                    analysis['raw_keypoints'] = keypoints_array
-
-                    pose_results.append(analysis)
+            pose_results.append(analysis)
 
         return pose_results
 
-    def update_detection_state(self, pose_results: List[dict]) -> bool:
+    @property
+    def consecutive_detections(self) -> int:
+        """Consecutive target pose detections for the default session"""
+        return self.sessions.get(DEFAULT_SESSION).consecutive_detections
+
+    @property
+    def last_alert_time(self) -> float:
+        """Last alert time for the default session"""
+        return self.sessions.get(DEFAULT_SESSION).last_alert_time
+
+    @property
+    def detection_history(self) -> List[bool]:
+        """Recent per-frame detections for the default session"""
+        return list(self.sessions.get(DEFAULT_SESSION).detection_history)
+
+    def update_detection_state(self, pose_results: List[dict],
+                               session_id: str = DEFAULT_SESSION) -> bool:
         """
         Update detection state and check for target pose
 
         Args:
             pose_results: List of pose analysis results
+            session_id: Stream whose temporal state should be updated
 
         Returns:
             True if target pose is detected consistently
         """
         target_detected = any(result['target_pose_detected'] for result in pose_results)
 
-        if target_detected:
-            self.consecutive_detections += 1
-        else:
-            self.consecutive_detections = 0
-
-        # Add to history (keep last 10 frames)
-        self.detection_history.append(target_detected)
-        if len(self.detection_history) > 10:
-            self.detection_history.pop(0)
+        return self.sessions.get(session_id).update(target_detected)
 
-        # Check if we have enough consecutive detections
-        return self.consecutive_detections >= config.CONSECUTIVE_FRAMES_THRESHOLD
+    def get_consecutive_detections(self, session_id: str = DEFAULT_SESSION) -> int:
+        """Get a session's number of consecutive frames with the target pose"""
+        return self.sessions.get(session_id).get_consecutive_detections()
 
-    def should_show_alert(self) -> bool:
+    def should_show_alert(self, session_id: str = DEFAULT_SESSION) -> bool:
         """Check if alert should be shown based on timing"""
-        current_time = time.time()
-        return current_time - self.last_alert_time > config.ALERT_DURATION
+        return self.sessions.get(session_id).should_show_alert()
 
-    def trigger_alert(self):
+    def trigger_alert(self, session_id: str = DEFAULT_SESSION):
         """Trigger alert and update timing"""
-        self.last_alert_time = time.time()
+        self.sessions.get(session_id).trigger_alert()
         print("🚨 TARGET POSE DETECTED: One arm with elbow above shoulder and hand above elbow! 🚨")
 
+    def claim_alert(self, session_id: str = DEFAULT_SESSION) -> bool:
+        """
+        Trigger the alert for a session unless it is still within the alert duration
+
+        Returns:
+            True if the alert was triggered
+        """
+        if not self.sessions.get(session_id).claim_alert():
+            return False
+        print(f"🚨 TARGET POSE DETECTED (session {session_id}): One arm with elbow above shoulder and hand above elbow! 🚨")
+        return True
+
     def draw_pose(self, frame: np.ndarray, pose_result: dict) -> np.ndarray:
         """
         Draw enhanced pose keypoints and skeleton on frame with tracking
 
         Args:
-            frame: Input frame
+            frame: Input frame (drawn on in place)
             pose_result: Pose analysis result
 
         Returns:
             Frame with pose visualization
         """
-        keypoints = pose_result['keypoints']
-
-        # Define skeleton connections - focus only on arms (shoulders, elbows, hands)
-        skeleton_connections = {
-            'left_arm': [('left_shoulder', 'left_elbow'), ('left_elbow', 'left_wrist')],
-            'right_arm': [('right_shoulder', 'right_elbow'), ('right_elbow', 'right_wrist')],
-            'shoulders': [('left_shoulder', 'right_shoulder')]  # Connection between shoulders
-        }
-
-        # Choose colors based on pose detection and body parts
-        if pose_result['target_pose_detected']:
-            base_color = config.COLORS['green']
-            arm_color = (0, 255, 0)  # Bright green for raised arms
-        elif pose_result['standing']:
-            base_color = config.COLORS['yellow']
-            arm_color = (0, 255, 255)  # Yellow
-        else:
-            base_color = config.COLORS['blue']
-            arm_color = (255, 0, 0)  # Blue
-
-        # Special highlighting for arms if raised
-        if pose_result['arms_raised']:
-            arm_color = (0, 255, 0)  # Bright green for raised arms
-
-        # Draw bounding box if available
-        if 'bbox' in pose_result:
-            bbox = pose_result['bbox']
-            x1, y1, x2, y2 = map(int, bbox)
-
-            # Choose bbox color based on detection
-            bbox_color = base_color
-            thickness = 3 if pose_result['target_pose_detected'] else 2
-
-            cv2.rectangle(frame, (x1, y1), (x2, y2), bbox_color, thickness)
-
-            # Draw person ID and confidence
-            person_id = pose_result.get('person_id', 0)
-            confidence = pose_result.get('confidence', 0.0)
-            label = f"Person {person_id}: {confidence:.2f}"
-
-            # Label background
-            label_size = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.6, 2)[0]
-            cv2.rectangle(frame, (x1, y1 - 25), (x1 + label_size[0], y1), bbox_color, -1)
-            cv2.putText(frame, label, (x1, y1 - 5), cv2.FONT_HERSHEY_SIMPLEX, 0.6,
-                       config.COLORS['white'], 2)
-
-        # Draw skeleton with different colors for different body parts
-        for part_name, connections in skeleton_connections.items():
-            if part_name in ['left_arm', 'right_arm']:
-                color = arm_color
-                thickness = config.LINE_THICKNESS + 2 if pose_result['target_pose_detected'] else config.LINE_THICKNESS + 1
-            elif part_name == 'shoulders':
-                color = (0, 255, 255)  # Cyan for shoulder connection
-                thickness = config.LINE_THICKNESS + 1 if pose_result['target_pose_detected'] else config.LINE_THICKNESS
-            else:
-                color = base_color
-                thickness = config.LINE_THICKNESS
-
-            for connection in connections:
-                point1_name, point2_name = connection
-                point1 = keypoints.get(point1_name)
-                point2 = keypoints.get(point2_name)
-
-                if (point1 and point2 and
-                    utils.is_keypoint_visible(point1) and
-                    utils.is_keypoint_visible(point2)):
-
-                    pt1 = (int(point1[0]), int(point1[1]))
-                    pt2 = (int(point2[0]), int(point2[1]))
-                    cv2.line(frame, pt1, pt2, color, thickness)
-
-        # Draw only relevant keypoints (hands, elbows, shoulders)
-        relevant_keypoints = ['left_shoulder', 'right_shoulder', 'left_elbow', 'right_elbow', 'left_wrist', 'right_wrist']
+        return render.draw_pose(frame, pose_result)
 
-        keypoint_colors = {
-            'left_shoulder': (0, 255, 255), 'right_shoulder': (0, 255, 255),  # Cyan for shoulders
-            'left_elbow': (255, 165, 0), 'right_elbow': (255, 165, 0),  # Orange for elbows
-            'left_wrist': arm_color, 'right_wrist': arm_color,  # Arm color for wrists/hands
-        }
-
-        for name in relevant_keypoints:
-            point = keypoints.get(name)
-            if point and utils.is_keypoint_visible(point):
-                center = (int(point[0]), int(point[1]))
-                color = keypoint_colors.get(name, base_color)
-
-                # Different sizes based on keypoint type and pose state
-                if name in ['left_wrist', 'right_wrist']:
-                    # Hands - largest when target pose is detected
-                    radius = 10 if pose_result['target_pose_detected'] else 8
-                elif name in ['left_elbow', 'right_elbow']:
-                    # Elbows - medium size, larger when target pose detected
-                    radius = 8 if pose_result['target_pose_detected'] else 6
-                elif name in ['left_shoulder', 'right_shoulder']:
-                    # Shoulders - reference points
-                    radius = 7 if pose_result['target_pose_detected'] else 5
-                else:
-                    radius = 4
-
-                cv2.circle(frame, center, radius, color, -1)
-                cv2.circle(frame, center, radius + 1, (255, 255, 255), 2)  # White outline
-
-                # Add labels for clarity
-                if pose_result['target_pose_detected']:
-                    label_map = {
-                        'left_wrist': 'LH', 'right_wrist': 'RH',  # LH = Left Hand, RH = Right Hand
-                        'left_elbow': 'LE', 'right_elbow': 'RE',  # LE = Left Elbow, RE = Right Elbow
-                        'left_shoulder': 'LS', 'right_shoulder': 'RS'  # LS = Left Shoulder, RS = Right Shoulder
-                    }
-                    label = label_map.get(name, '')
-                    if label:
-                        cv2.putText(frame, label, (center[0] - 10, center[1] - 15),
-                                   cv2.FONT_HERSHEY_SIMPLEX, 0.4, (255, 255, 255), 1)
-
-        # Draw pose status text near the person
-        if 'bbox' in pose_result:
-            bbox = pose_result['bbox']
-            x1, y1, x2, y2 = map(int, bbox)
-
-            status_texts = []
-            if pose_result.get('elbows_above_shoulders_and_hands_above_elbows', False):
-                status_texts.append("ELBOWS UP & HANDS UP")
-            if pose_result['target_pose_detected']:
-                status_texts.append("TARGET POSE DETECTED!")
-
-            # Draw status text
-            for i, text in enumerate(status_texts):
-                y_offset = y2 + 20 + (i * 25)
-                text_color = (0, 255, 0) if pose_result['target_pose_detected'] else (255, 255, 255)
-                cv2.putText(frame, text, (x1, y_offset), cv2.FONT_HERSHEY_SIMPLEX,
-                           0.7, text_color, 2)
-
-        return frame
-
-    def draw_poses(self, frame: np.ndarray, pose_results: List[dict]) -> np.ndarray:
+    def draw_poses(self, frame: np.ndarray, pose_results: List[dict], max_dim: int = 0,
+                   in_place: bool = False) -> np.ndarray:
         """
         Draw multiple poses on frame
 
         Args:
             frame: Input frame
             pose_results: List of pose analysis results
+            max_dim: Draw on a downscaled preview with this longer side (0 for full resolution)
+            in_place: Draw on frame itself instead of a copy
 
         Returns:
-            Frame with all poses visualized
+            Frame (or preview) with all poses visualized
         """
-        result_frame = frame.copy()
-
-        # Draw each pose on the frame
-        for pose_result in pose_results:
-            result_frame = self.draw_pose(result_frame, pose_result)
-
-        return result_frame
+        return render.draw_poses(frame, pose_results, max_dim, in_place)
 
     def draw_status(self, frame: np.ndarray, pose_results: List[dict],
                    alert_active: bool) -> np.ndarray:
@@ -0,0 +1,131 @@
+"""
+Single-pass letterbox preprocessing with cached forward and inverse transforms
+"""
+
+import threading
+from functools import lru_cache
+from typing import List, Tuple
+
+import cv2
+import numpy as np
+
+# Padding value YOLO models are trained with
+LETTERBOX_PAD_VALUE = 114
+
+_buffers = threading.local()
+
+
+class LetterboxTransform:
+    def __init__(self, height: int, width: int, size: int):
+        """
+        Affine transform between a frame and its square letterboxed model input
+
+        The frame is scaled to fit into size x size keeping its aspect ratio
+        and centered, with the remaining border padded.
+
+        Args:
+            height: Frame height
+            width: Frame width
+            size: Side of the square model input
+        """
+        self.height = height
+        self.width = width
+        self.size = size
+
+        self.scale = min(size / width, size / height)
+        self.resized_width = min(size, int(round(width * self.scale)))
+        self.resized_height = min(size, int(round(height * self.scale)))
+        self.pad_x = (size - self.resized_width) // 2
+        self.pad_y = (size - self.resized_height) // 2
+
+        # Per-axis scales after rounding the resized size to whole pixels
+        scale_x = self.resized_width / width
+        scale_y = self.resized_height / height
+
+        # Frame -> model input
+        self.forward = np.array([[scale_x, 0.0, self.pad_x],
+                                 [0.0, scale_y, self.pad_y]], dtype=np.float64)
+        # Model input -> frame, applied to keypoints and boxes
+        self.inverse = np.array([[1.0 / scale_x, 0.0, -self.pad_x / scale_x],
+                                 [0.0, 1.0 / scale_y, -self.pad_y / scale_y]], dtype=np.float64)
+
+    def apply(self, frame: np.ndarray, out: np.ndarray) -> np.ndarray:
+        """
+        Resize a frame straight into its region of out and pad the border
+
+        Args:
+            frame: BGR frame of this transform's resolution
+            out: (size, size, 3) uint8 buffer to write into
+
+        Returns:
+            out
+        """
+        top, left = self.pad_y, self.pad_x
+        bottom, right = top + self.resized_height, left + self.resized_width
+
+        # Only the border bands are filled; the resize writes the rest in place
+        out[:top] = LETTERBOX_PAD_VALUE
+        out[bottom:] = LETTERBOX_PAD_VALUE
+        out[top:bottom, :left] = LETTERBOX_PAD_VALUE
+        out[top:bottom, right:] = LETTERBOX_PAD_VALUE
+        cv2.resize(frame, (self.resized_width, self.resized_height),
+                   dst=out[top:bottom, left:right], interpolation=cv2.INTER_LINEAR)
+        return out
+
+    def points_to_frame(self, points: np.ndarray) -> np.ndarray:
+        """
+        Map (..., 2+) arrays of x, y model-input coordinates back to the frame in place
+
+        Any columns after x and y (e.g. keypoint confidence) are left unchanged.
+        """
+        points[..., 0] = points[..., 0] * self.inverse[0, 0] + self.inverse[0, 2]
+        points[..., 1] = points[..., 1] * self.inverse[1, 1] + self.inverse[1, 2]
+        return points
+
+    def boxes_to_frame(self, boxes: np.ndarray) -> np.ndarray:
+        """Map (N, 4) xyxy model-input boxes back to the frame in place, clipped to its bounds"""
+        corners = boxes.reshape(-1, 2, 2)
+        self.points_to_frame(corners)
+        boxes[:, [0, 2]] = np.clip(boxes[:, [0, 2]], 0, self.width)
+        boxes[:, [1, 3]] = np.clip(boxes[:, [1, 3]], 0, self.height)
+        return boxes
+
+
+@lru_cache(maxsize=64)
+def get_transform(height: int, width: int, size: int) -> LetterboxTransform:
+    """Get the cached letterbox transform for a frame resolution and model input size"""
+    return LetterboxTransform(height, width, size)
+
+
+def _get_buffer(size: int, slot: int) -> np.ndarray:
+    """Get this thread's reusable model input buffer for a batch slot"""
+    pool = getattr(_buffers, 'pool', None)
+    if pool is None:
+        pool = _buffers.pool = {}
+    buffer = pool.get((size, slot))
+    if buffer is None:
+        buffer = pool[(size, slot)] = np.empty((size, size, 3), dtype=np.uint8)
+    return buffer
+
+
+def letterbox_batch(frames: List[np.ndarray], size: int) -> Tuple[List[np.ndarray], List[LetterboxTransform]]:
+    """
+    Letterbox a batch of frames into this thread's reusable buffers
+
+    The returned images are only valid until the same thread letterboxes
+    its next batch.
+
+    Args:
+        frames: BGR frames of any resolution
+        size: Side of the square model input
+
+    Returns:
+        Tuple of (model input images, transform for each frame)
+    """
+    images = []
+    transforms = []
+    for slot, frame in enumerate(frames):
+        transform = get_transform(frame.shape[0], frame.shape[1], size)
+        images.append(transform.apply(frame, _get_buffer(size, slot)))
+        transforms.append(transform)
+    return images, transforms
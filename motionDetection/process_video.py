@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Offline pose timelines for video files, written as one JSON line per processed frame
+
+Usage:
+    python process_video.py ../public/videos/temu-ad.mp4
+    python process_video.py ../public/videos/temu-ad.mp4 --stride 3 --input-size 416 -o temu.jsonl
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from typing import Iterator, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+import config
+from pose_detector import PoseDetector, INFERENCE_BACKENDS
+
+# Marks the end of the decoded frame stream
+_END = object()
+
+
+class FrameReader:
+    def __init__(self, video_path: str, stride: int = config.VIDEO_FRAME_STRIDE,
+                 queue_size: int = config.VIDEO_QUEUE_SIZE, max_frames: Optional[int] = None):
+        """
+        Decode a video on a background thread into a bounded queue
+
+        Frames between strides are only grabbed (demuxed), never decoded to
+        BGR. The bounded queue keeps memory constant: decoding blocks while
+        inference is behind.
+
+        Args:
+            video_path: Video file to read
+            stride: Keep every Nth frame
+            queue_size: Maximum decoded frames waiting for inference
+            max_frames: Stop after this many source frames (None for the whole video)
+        """
+        self.capture = cv2.VideoCapture(video_path)
+        if not self.capture.isOpened():
+            raise ValueError(f"Could not open video {video_path}")
+
+        self.stride = max(1, int(stride))
+        self.max_frames = max_frames
+        self.fps = self.capture.get(cv2.CAP_PROP_FPS) or 0.0
+        self.frame_count = int(self.capture.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+        self.frames_read = 0
+        self.error = None
+
+        self._queue = queue.Queue(maxsize=max(1, int(queue_size)))
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='video-decode', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        try:
+            index = 0
+            while not self._stop.is_set() and (self.max_frames is None or index < self.max_frames):
+                if not self.capture.grab():
+                    break
+                self.frames_read = index + 1
+                if index % self.stride == 0:
+                    ok, frame = self.capture.retrieve()
+                    if not ok:
+                        break
+                    self._put((index, frame))
+                index += 1
+        except Exception as e:
+            self.error = e
+        finally:
+            self.capture.release()
+            self._put(_END)
+
+    def _put(self, item):
+        """Block while the queue is full, giving up once the reader is closed"""
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def batches(self, batch_size: int) -> Iterator[List[Tuple[int, np.ndarray]]]:
+        """
+        Yield lists of (frame index, frame), taking whatever is decoded up to batch_size
+
+        Raises:
+            Exception: Re-raises a decode error once the frames before it were yielded
+        """
+        batch_size = max(1, int(batch_size))
+        while True:
+            batch = [self._queue.get()]
+            while batch[-1] is not _END and len(batch) < batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            done = batch[-1] is _END
+            frames = [item for item in batch if item is not _END]
+            if frames:
+                yield frames
+            if done:
+                if self.error is not None:
+                    raise self.error
+                return
+
+    def close(self):
+        """Stop decoding and wait for the decode thread"""
+        self._stop.set()
+        self._thread.join()
+
+
+def frame_record(index: int, fps: float, pose_results: List[dict]) -> dict:
+    """
+    Compact per-frame record: keypoints as [x, y, confidence] in COCO order
+
+    Args:
+        index: Source frame index
+        fps: Source frame rate (0 when unknown)
+        pose_results: Pose analysis results for the frame
+    """
+    people = []
+    for i, result in enumerate(pose_results):
+        person = {
+            'person_id': int(result.get('person_id', i)) + 1,
+            'confidence': round(float(result.get('confidence', 0.0)), 3),
+            'target_pose_detected': bool(result['target_pose_detected']),
+            'standing': bool(result.get('standing', False)),
+            'keypoints': np.round(np.asarray(result['raw_keypoints'], dtype=np.float64), 2).tolist()
+        }
+        if 'bbox' in result:
+            person['bbox'] = np.round(np.asarray(result['bbox'], dtype=np.float64), 1).tolist()
+        people.append(person)
+
+    return {
+        'frame': index,
+        'time_s': round(index / fps, 3) if fps else None,
+        'people': people,
+        'target_pose_detected': any(person['target_pose_detected'] for person in people)
+    }
+
+
+def process_video(detector: PoseDetector, reader: FrameReader, output,
+                  batch_size: int = config.MAX_BATCH_SIZE, progress_every: float = 5.0) -> dict:
+    """
+    Run batched detection over a video and stream JSON lines to output
+
+    Args:
+        detector: Pose detector
+        reader: Started frame reader
+        output: Text file to write one JSON line per processed frame to
+        batch_size: Maximum frames per model call
+        progress_every: Seconds between progress lines on stderr
+
+    Returns:
+        Dictionary with frame counts, timing and the speed relative to real time
+    """
+    start = time.perf_counter()
+    last_progress = start
+    frames_processed = 0
+    last_index = -1
+
+    for batch in reader.batches(batch_size):
+        indices = [index for index, _ in batch]
+        all_results = detector.detect_poses_many([frame for _, frame in batch], max_batch_size=batch_size)
+        for index, pose_results in zip(indices, all_results):
+            output.write(json.dumps(frame_record(index, reader.fps, pose_results)) + '\n')
+        frames_processed += len(batch)
+        last_index = indices[-1]
+
+        now = time.perf_counter()
+        if now - last_progress >= progress_every:
+            last_progress = now
+            total = f"/{reader.frame_count}" if reader.frame_count else ''
+            print(f"  frame {last_index + 1}{total}, {frames_processed / (now - start):.1f} fps",
+                  file=sys.stderr)
+
+    elapsed = time.perf_counter() - start
+    video_seconds = reader.frames_read / reader.fps if reader.fps else 0.0
+    return {
+        'frames_read': reader.frames_read,
+        'frames_processed': frames_processed,
+        'elapsed_s': elapsed,
+        'fps': frames_processed / elapsed if elapsed > 0 else 0.0,
+        'realtime_factor': video_seconds / elapsed if elapsed > 0 and video_seconds else 0.0
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Write per-frame pose detections for a video as JSONL')
+    parser.add_argument('video', help='Video file to process')
+    parser.add_argument('-o', '--output', default=None,
+                        help="JSONL output file (default: <video>.poses.jsonl, '-' for stdout)")
+    parser.add_argument('--model', default=config.YOLO_MODEL,
+                        help='YOLO pose model path, or a key of config.MODEL_OPTIONS')
+    parser.add_argument('--backend', default=config.INFERENCE_BACKEND, choices=list(INFERENCE_BACKENDS),
+                        help='Inference backend')
+    parser.add_argument('--input-size', type=int, default=config.INPUT_SIZE, help='Model input size')
+    parser.add_argument('--batch-size', type=int, default=config.MAX_BATCH_SIZE,
+                        help='Maximum frames per model call')
+    parser.add_argument('--stride', type=int, default=config.VIDEO_FRAME_STRIDE,
+                        help='Process every Nth frame')
+    parser.add_argument('--queue-size', type=int, default=config.VIDEO_QUEUE_SIZE,
+                        help='Decoded frames buffered ahead of inference')
+    parser.add_argument('--max-frames', type=int, default=None,
+                        help='Stop after this many source frames')
+    args = parser.parse_args()
+
+    model_path = config.MODEL_OPTIONS.get(args.model, args.model)
+    output_path = args.output or f"{os.path.splitext(args.video)[0]}.poses.jsonl"
+
+    # Keep model-loading messages out of the JSONL when it goes to stdout
+    output = sys.stdout if output_path == '-' else None
+    with contextlib.redirect_stdout(sys.stderr):
+        detector = PoseDetector(model_path, optimize_for_speed=True, backend=args.backend)
+        detector.set_operating_point(model_path, args.input_size)
+
+    try:
+        reader = FrameReader(args.video, args.stride, args.queue_size, args.max_frames)
+    except ValueError as e:
+        print(f"! {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if output is None:
+        output = open(output_path, 'w', buffering=1024 * 1024)
+    try:
+        with contextlib.redirect_stdout(sys.stderr):
+            summary = process_video(detector, reader, output, args.batch_size)
+    finally:
+        reader.close()
+        if output is not sys.stdout:
+            output.close()
+
+    print(f"✓ {summary['frames_processed']} of {summary['frames_read']} frames in "
+          f"{summary['elapsed_s']:.1f} s ({summary['fps']:.1f} fps, "
+          f"{summary['realtime_factor']:.1f}x real time)", file=sys.stderr)
+    if output_path != '-':
+        print(f"Detections written to {output_path}", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,186 @@
+"""
+Fast pose overlay rendering with static layout tables and cached text metrics
+"""
+
+from functools import lru_cache
+from typing import List, Tuple
+
+import cv2
+import numpy as np
+
+import config
+from utils import KEYPOINT_NAMES
+
+_KP = config.KEYPOINTS
+_VISIBLE_THRESHOLD = 0.3  # Same default as utils.is_keypoint_visible
+
+CYAN = (0, 255, 255)
+ORANGE = (255, 165, 0)
+WHITE = (255, 255, 255)
+
+# Arms (shoulder-elbow-wrist) and the line between the shoulders, as keypoint index pairs
+ARM_SEGMENTS = np.array([
+    (_KP['left_shoulder'], _KP['left_elbow']), (_KP['left_elbow'], _KP['left_wrist']),
+    (_KP['right_shoulder'], _KP['right_elbow']), (_KP['right_elbow'], _KP['right_wrist'])
+])
+SHOULDER_SEGMENTS = np.array([(_KP['left_shoulder'], _KP['right_shoulder'])])
+
+# Drawn keypoints in drawing order: (index, label, radius, radius in target pose, color or None for the arm color)
+KEYPOINT_STYLES = (
+    (_KP['left_shoulder'], 'LS', 5, 7, CYAN),
+    (_KP['right_shoulder'], 'RS', 5, 7, CYAN),
+    (_KP['left_elbow'], 'LE', 6, 8, ORANGE),
+    (_KP['right_elbow'], 'RE', 6, 8, ORANGE),
+    (_KP['left_wrist'], 'LH', 8, 10, None),
+    (_KP['right_wrist'], 'RH', 8, 10, None),
+)
+_KEYPOINT_INDICES = np.array([style[0] for style in KEYPOINT_STYLES])
+
+LABEL_FONT = cv2.FONT_HERSHEY_SIMPLEX
+
+
+def _build_style(target_pose: bool, standing: bool, arms_raised: bool) -> dict:
+    """Colors, thicknesses, radii and status lines for one combination of pose flags"""
+    if target_pose:
+        base_color, arm_color = config.COLORS['green'], (0, 255, 0)
+    elif standing:
+        base_color, arm_color = config.COLORS['yellow'], (0, 255, 255)
+    else:
+        base_color, arm_color = config.COLORS['blue'], (255, 0, 0)
+    if arms_raised:
+        arm_color = (0, 255, 0)
+
+    return {
+        'base_color': base_color,
+        'arm_color': arm_color,
+        'bbox_thickness': 3 if target_pose else 2,
+        'arm_thickness': config.LINE_THICKNESS + (2 if target_pose else 1),
+        'shoulder_thickness': config.LINE_THICKNESS + (1 if target_pose else 0),
+        'keypoints': [(label if target_pose else None, target_radius if target_pose else radius,
+                       color if color is not None else arm_color)
+                      for _, label, radius, target_radius, color in KEYPOINT_STYLES],
+        'status_color': (0, 255, 0) if target_pose else WHITE
+    }
+
+
+# Every style, keyed by (target_pose_detected, standing, arms_raised)
+STYLES = {(target, standing, raised): _build_style(target, standing, raised)
+          for target in (False, True) for standing in (False, True) for raised in (False, True)}
+
+
+@lru_cache(maxsize=4096)
+def text_size(text: str, scale: float, thickness: int) -> Tuple[int, int]:
+    """cv2.getTextSize width and height, cached per label"""
+    return cv2.getTextSize(text, LABEL_FONT, scale, thickness)[0]
+
+
+def _keypoint_array(pose_result: dict) -> np.ndarray:
+    """A person's (17, 3) keypoints, from the raw array when the result carries one"""
+    raw = pose_result.get('raw_keypoints')
+    if raw is not None:
+        return np.asarray(raw, dtype=np.float32).reshape(-1, 3)
+    keypoints = pose_result['keypoints']
+    return np.array([keypoints.get(name, (0.0, 0.0, 0.0))[:3] for name in KEYPOINT_NAMES], dtype=np.float32)
+
+
+def _draw_segments(frame: np.ndarray, points: np.ndarray, visible: np.ndarray,
+                   segments: np.ndarray, color: tuple, thickness: int):
+    """Draw every segment whose two ends are visible with a single polylines call"""
+    shown = segments[visible[segments[:, 0]] & visible[segments[:, 1]]]
+    if len(shown):
+        cv2.polylines(frame, list(points[shown]), False, color, thickness)
+
+
+def draw_pose(frame: np.ndarray, pose_result: dict, scale: float = 1.0) -> np.ndarray:
+    """
+    Draw one person's box, arm skeleton, keypoints and status onto frame in place
+
+    Args:
+        frame: Image to draw on (modified)
+        pose_result: Pose analysis result
+        scale: Factor from result coordinates to frame coordinates (preview drawing)
+
+    Returns:
+        The same frame
+    """
+    target_pose = bool(pose_result['target_pose_detected'])
+    style = STYLES[(target_pose, bool(pose_result['standing']), bool(pose_result['arms_raised']))]
+
+    bbox = None
+    if 'bbox' in pose_result:
+        bbox = [int(value * scale) for value in pose_result['bbox'][:4]]
+        x1, y1, x2, y2 = bbox
+        cv2.rectangle(frame, (x1, y1), (x2, y2), style['base_color'], style['bbox_thickness'])
+
+        label = f"Person {pose_result.get('person_id', 0)}: {pose_result.get('confidence', 0.0):.2f}"
+        label_width = text_size(label, 0.6, 2)[0]
+        cv2.rectangle(frame, (x1, y1 - 25), (x1 + label_width, y1), style['base_color'], -1)
+        cv2.putText(frame, label, (x1, y1 - 5), LABEL_FONT, 0.6, config.COLORS['white'], 2)
+
+    keypoints = _keypoint_array(pose_result)
+    # Truncate like int() so full-resolution drawing matches pixel coordinates exactly
+    points = (keypoints[:, :2] * scale).astype(np.int32)
+    visible = keypoints[:, 2] > _VISIBLE_THRESHOLD
+
+    _draw_segments(frame, points, visible, ARM_SEGMENTS, style['arm_color'], style['arm_thickness'])
+    _draw_segments(frame, points, visible, SHOULDER_SEGMENTS, CYAN, style['shoulder_thickness'])
+
+    for index, (label, radius, color) in zip(_KEYPOINT_INDICES, style['keypoints']):
+        if not visible[index]:
+            continue
+        center = (int(points[index, 0]), int(points[index, 1]))
+        cv2.circle(frame, center, radius, color, -1)
+        cv2.circle(frame, center, radius + 1, WHITE, 2)
+        if label:
+            cv2.putText(frame, label, (center[0] - 10, center[1] - 15), LABEL_FONT, 0.4, WHITE, 1)
+
+    if bbox is not None:
+        status_texts = []
+        if pose_result.get('elbows_above_shoulders_and_hands_above_elbows', False):
+            status_texts.append("ELBOWS UP & HANDS UP")
+        if target_pose:
+            status_texts.append("TARGET POSE DETECTED!")
+        for i, text in enumerate(status_texts):
+            cv2.putText(frame, text, (bbox[0], bbox[3] + 20 + i * 25), LABEL_FONT, 0.7,
+                        style['status_color'], 2)
+
+    return frame
+
+
+def fit_to_max_dim(frame: np.ndarray, max_dim: int = 0) -> Tuple[np.ndarray, float]:
+    """
+    Downscale a frame so its longer side is at most max_dim
+
+    Returns:
+        Tuple of (frame or its downscaled copy, scale factor); frames already
+        small enough (or max_dim 0) are returned as-is with scale 1.0
+    """
+    height, width = frame.shape[:2]
+    if not max_dim or max(height, width) <= max_dim:
+        return frame, 1.0
+    scale = max_dim / max(height, width)
+    size = (max(1, round(width * scale)), max(1, round(height * scale)))
+    return cv2.resize(frame, size, interpolation=cv2.INTER_AREA), scale
+
+
+def draw_poses(frame: np.ndarray, pose_results: List[dict], max_dim: int = 0,
+               in_place: bool = False) -> np.ndarray:
+    """
+    Draw every person's pose, optionally on a downscaled preview
+
+    Args:
+        frame: Input frame
+        pose_results: Pose analysis results in frame coordinates
+        max_dim: Draw on a preview whose longer side is at most this (0 for full resolution)
+        in_place: Draw directly on frame instead of a copy (ignored when a preview is made)
+
+    Returns:
+        The annotated frame or preview
+    """
+    canvas, scale = fit_to_max_dim(frame, max_dim)
+    if canvas is frame and not in_place:
+        canvas = frame.copy()
+
+    for pose_result in pose_results:
+        draw_pose(canvas, pose_result, scale)
+    return canvas
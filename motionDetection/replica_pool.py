@@ -0,0 +1,339 @@
+"""
+Multi-process pool of PoseDetector replicas pinned to CPU core sets
+"""
+
+import itertools
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from multiprocessing import shared_memory
+from typing import List, Optional
+
+import numpy as np
+
+import config
+
+
+def available_cores() -> List[int]:
+    """Get the CPU cores this process may run on"""
+    if hasattr(os, 'sched_getaffinity'):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def split_cores(num_replicas: int, cores_per_replica: Optional[int] = None) -> List[List[int]]:
+    """
+    Split the available cores into one disjoint core set per replica
+
+    Args:
+        num_replicas: Number of replicas
+        cores_per_replica: Cores for each replica (default: an even share)
+
+    Returns:
+        List of core id lists, one per replica
+    """
+    cores = available_cores()
+    if cores_per_replica is None:
+        cores_per_replica = max(1, len(cores) // num_replicas)
+
+    core_sets = []
+    for i in range(num_replicas):
+        core_set = cores[i * cores_per_replica:(i + 1) * cores_per_replica]
+        # More replicas than cores: share cores round-robin
+        core_sets.append(core_set or [cores[i % len(cores)]])
+    return core_sets
+
+
+def _replica_main(replica_id: int, cores: List[int], model_path: str, backend: str,
+                  jobs, results):
+    """
+    Replica process: pin to its cores, load a detector and serve batched jobs
+
+    Jobs are (job_id, shm_name, [(shape, offset), ...], input_size) tuples whose frames
+    live in a shared memory block written by the parent, so frame pixels are
+    never pickled. Results are sent back as (job_id, pose_results, error).
+    """
+    if hasattr(os, 'sched_setaffinity'):
+        os.sched_setaffinity(0, cores)
+
+    # Match torch's thread pool to the pinned core set
+    config.CPU_INTRA_OP_THREADS = len(cores)
+    config.CPU_INTER_OP_THREADS = 1
+
+    from pose_detector import PoseDetector
+
+    try:
+        detector = PoseDetector(model_path, optimize_for_speed=True, backend=backend)
+        detector.warmup()
+    except Exception as e:
+        results.put(('failed', replica_id, str(e)))
+        return
+    results.put(('ready', replica_id, detector.inference_settings))
+
+    while True:
+        job = jobs.get()
+        if job is None:
+            break
+
+        job_id, shm_name, layout, input_size = job
+        shm = None
+        try:
+            shm = shared_memory.SharedMemory(name=shm_name)
+            frames = [np.ndarray(shape, dtype=np.uint8, buffer=shm.buf, offset=offset)
+                      for shape, offset in layout]
+            pose_results = detector.detect_poses_many(frames, max_batch_size=len(frames),
+                                                      input_size=input_size)
+            del frames
+            results.put((job_id, pose_results, None))
+        except Exception as e:
+            results.put((job_id, None, str(e)))
+        finally:
+            if shm is not None:
+                shm.close()
+
+
+class ReplicaPool:
+    def __init__(self, num_replicas: int = config.REPLICA_WORKERS,
+                 cores_per_replica: Optional[int] = config.REPLICA_CORES_PER_WORKER,
+                 model_path: str = config.YOLO_MODEL, backend: str = config.INFERENCE_BACKEND):
+        """
+        Start PoseDetector replicas in separate processes
+
+        Each replica is pinned to its own core set with a matching torch thread
+        count. Requests go to the replica with the fewest frames in flight, and
+        frames are handed over through shared memory. A replica whose process
+        exits has its pending jobs failed and receives no further jobs.
+
+        Args:
+            num_replicas: Number of replica processes
+            cores_per_replica: Cores pinned to each replica (default: an even share)
+            model_path: YOLO pose model each replica loads
+            backend: Inference backend each replica uses
+        """
+        self.num_replicas = max(1, int(num_replicas))
+        self._closed = False
+        self._collector = None
+        self.core_sets = split_cores(self.num_replicas, cores_per_replica)
+
+        # spawn: replicas must not inherit the parent's torch thread pools
+        context = mp.get_context('spawn')
+        self._results = context.Queue()
+        self._jobs = []
+        self._processes = []
+        for replica_id, cores in enumerate(self.core_sets):
+            jobs = context.Queue()
+            process = context.Process(target=_replica_main, name=f'pose-replica-{replica_id}',
+                                      args=(replica_id, cores, model_path, backend, jobs, self._results),
+                                      daemon=True)
+            process.start()
+            self._jobs.append(jobs)
+            self._processes.append(process)
+
+        self.replica_settings = {}
+        self._wait_until_ready()
+
+        self._lock = threading.Lock()
+        self._job_ids = itertools.count()
+        self._pending = {}
+        self._in_flight = [0] * self.num_replicas
+        self._frames_processed = [0] * self.num_replicas
+        self._dead = set()
+
+        self._collector = threading.Thread(target=self._collect_results, name='pose-replica-results',
+                                           daemon=True)
+        self._collector.start()
+
+    def _wait_until_ready(self):
+        """Block until every replica has loaded and warmed up its model"""
+        waiting = set(range(self.num_replicas))
+        while waiting:
+            try:
+                status, replica_id, detail = self._results.get(timeout=config.REPLICA_START_TIMEOUT_S)
+            except queue.Empty:
+                self.close()
+                raise RuntimeError(f"Replicas {sorted(waiting)} did not start within "
+                                   f"{config.REPLICA_START_TIMEOUT_S}s") from None
+            if status == 'failed':
+                self.close()
+                raise RuntimeError(f"Replica {replica_id} failed to start: {detail}")
+            self.replica_settings[replica_id] = {'cores': self.core_sets[replica_id], **detail}
+            waiting.discard(replica_id)
+            print(f"✓ Replica {replica_id} ready on cores {self.core_sets[replica_id]}")
+
+    def submit(self, frames: List[np.ndarray], input_size: Optional[int] = None) -> Future:
+        """
+        Send frames to the least-loaded replica
+
+        Args:
+            frames: Input image frames
+            input_size: Model input size (default: the replica's current one)
+
+        Returns:
+            Future resolving to one list of pose analysis results per frame
+        """
+        frames = [np.ascontiguousarray(frame, dtype=np.uint8) for frame in frames]
+        total_bytes = sum(frame.nbytes for frame in frames)
+
+        # Copy all frames of the job into one shared memory block
+        shm = shared_memory.SharedMemory(create=True, size=max(1, total_bytes))
+        layout = []
+        offset = 0
+        for frame in frames:
+            np.ndarray(frame.shape, dtype=np.uint8, buffer=shm.buf, offset=offset)[...] = frame
+            layout.append((frame.shape, offset))
+            offset += frame.nbytes
+
+        future = Future()
+        with self._lock:
+            live = [replica_id for replica_id in range(self.num_replicas) if replica_id not in self._dead]
+            if live:
+                replica_id = min(live, key=lambda i: self._in_flight[i])
+                self._in_flight[replica_id] += len(frames)
+                job_id = next(self._job_ids)
+                self._pending[job_id] = (future, shm, replica_id, len(frames))
+
+        if not live:
+            shm.close()
+            shm.unlink()
+            raise RuntimeError("No replica processes are running")
+
+        self._jobs[replica_id].put((job_id, shm.name, layout, input_size))
+        return future
+
+    def detect_poses_many(self, frames: List[np.ndarray],
+                          max_batch_size: Optional[int] = None,
+                          input_size: Optional[int] = None) -> List[List[dict]]:
+        """Detect poses in several frames on one replica (same contract as PoseDetector)"""
+        if not frames:
+            return []
+        try:
+            return self.submit(frames, input_size).result(timeout=config.REPLICA_RESULT_TIMEOUT_S)
+        except FutureTimeoutError:
+            raise TimeoutError(f"No replica result within {config.REPLICA_RESULT_TIMEOUT_S}s") from None
+
+    def detect_poses(self, frame: np.ndarray) -> List[dict]:
+        """Detect poses in a single frame on the least-loaded replica"""
+        return self.detect_poses_many([frame])[0]
+
+    def _collect_results(self):
+        """Resolve futures as replicas report results, and watch for replicas that exit"""
+        next_check = time.monotonic() + config.REPLICA_HEALTH_CHECK_S
+        while True:
+            try:
+                message = self._results.get(timeout=config.REPLICA_HEALTH_CHECK_S)
+            except queue.Empty:
+                pass
+            except (EOFError, OSError):
+                # Queue torn down at interpreter shutdown
+                break
+            else:
+                if message is None:
+                    break
+                self._resolve(message)
+
+            if time.monotonic() >= next_check:
+                next_check = time.monotonic() + config.REPLICA_HEALTH_CHECK_S
+                if not self._check_replicas():
+                    break
+
+    def _resolve(self, message: tuple):
+        """Resolve the future of one replica result message"""
+        job_id, pose_results, error = message
+        with self._lock:
+            pending = self._pending.pop(job_id, None)
+            if pending is None:
+                # Already failed when its replica was found dead
+                return
+            future, shm, replica_id, num_frames = pending
+            self._in_flight[replica_id] -= num_frames
+            self._frames_processed[replica_id] += num_frames
+
+        shm.close()
+        shm.unlink()
+
+        if error is not None:
+            future.set_exception(RuntimeError(f"Replica {replica_id} failed: {error}"))
+        else:
+            future.set_result(pose_results)
+
+    def _check_replicas(self) -> bool:
+        """
+        Fail the pending jobs of replicas whose process has exited and stop routing to them
+
+        Returns:
+            False if the pool's stop message was read meanwhile
+        """
+        if self._closed:
+            return True
+        exited = [replica_id for replica_id in range(self.num_replicas)
+                  if replica_id not in self._dead and not self._processes[replica_id].is_alive()]
+        if not exited:
+            return True
+
+        # Results a replica sent before exiting are already queued; resolve those first
+        while True:
+            try:
+                message = self._results.get_nowait()
+            except queue.Empty:
+                break
+            if message is None:
+                return False
+            self._resolve(message)
+
+        with self._lock:
+            self._dead.update(exited)
+            failed = [(job_id, pending) for job_id, pending in self._pending.items() if pending[2] in exited]
+            for job_id, _ in failed:
+                del self._pending[job_id]
+            for replica_id in exited:
+                self._in_flight[replica_id] = 0
+
+        for replica_id in exited:
+            print(f"! Replica {replica_id} exited (code {self._processes[replica_id].exitcode}), "
+                  f"failing its {sum(1 for _, pending in failed if pending[2] == replica_id)} pending jobs")
+        for _, (future, shm, replica_id, _) in failed:
+            shm.close()
+            shm.unlink()
+            future.set_exception(RuntimeError(f"Replica {replica_id} exited before returning results"))
+        return True
+
+    def queue_depth(self) -> int:
+        """Frames currently in flight across all replicas"""
+        with self._lock:
+            return sum(self._in_flight)
+
+    def stats(self) -> dict:
+        """Get per-replica load statistics"""
+        with self._lock:
+            return {
+                'replicas': [
+                    {
+                        'replica_id': replica_id,
+                        'alive': self._processes[replica_id].is_alive(),
+                        'in_flight': self._in_flight[replica_id],
+                        'frames_processed': self._frames_processed[replica_id],
+                        **self.replica_settings.get(replica_id, {'cores': self.core_sets[replica_id]})
+                    }
+                    for replica_id in range(self.num_replicas)
+                ]
+            }
+
+    def close(self):
+        """Stop all replica processes"""
+        if self._closed:
+            return
+        self._closed = True
+
+        for jobs in self._jobs:
+            jobs.put(None)
+        for process in self._processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+
+        self._results.put(None)
+        if self._collector is not None:
+            self._collector.join(timeout=5)
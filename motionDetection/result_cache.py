@@ -0,0 +1,108 @@
+"""
+Content-addressed LRU cache of detection results for repeated image payloads
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable, List, Optional, Tuple, Union
+
+import config
+
+# Rough per-person memory of a pose result dict (flags, keypoint and box arrays)
+PERSON_RESULT_BYTES = 4096
+ENTRY_OVERHEAD_BYTES = 256
+
+
+def payload_digest(payload: Union[bytes, str]) -> bytes:
+    """Fast 128-bit hash of a raw image payload (bytes or base64/data URL string)"""
+    if isinstance(payload, str):
+        payload = payload.encode('utf-8')
+    return hashlib.blake2b(payload, digest_size=16).digest()
+
+
+def estimate_size(pose_results: List[dict]) -> int:
+    """Approximate memory held by one frame's pose results"""
+    return ENTRY_OVERHEAD_BYTES + len(pose_results) * PERSON_RESULT_BYTES
+
+
+class ResultCache:
+    def __init__(self, max_entries: int = config.RESULT_CACHE_MAX_ENTRIES,
+                 max_bytes: int = config.RESULT_CACHE_MAX_BYTES):
+        """
+        Thread-safe LRU cache bounded by entry count and approximate bytes
+
+        Args:
+            max_entries: Maximum number of cached results
+            max_bytes: Maximum approximate memory of all cached results
+        """
+        self.max_entries = max(1, int(max_entries))
+        self.max_bytes = max_bytes
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key_for(payload: Union[bytes, str], config_key: Hashable) -> Tuple[Hashable, bytes]:
+        """
+        Build the cache key for an image payload
+
+        Args:
+            payload: Raw image payload as received
+            config_key: Everything else the results depend on (model, input size, thresholds)
+        """
+        return config_key, payload_digest(payload)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Get a cached value and mark it as recently used"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: Hashable, value: Any, size_bytes: int):
+        """Cache a value, evicting least recently used entries beyond the bounds"""
+        if size_bytes > self.max_bytes:
+            return
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.current_bytes -= previous[1]
+
+            self._entries[key] = (value, size_bytes)
+            self.current_bytes += size_bytes
+
+            while len(self._entries) > self.max_entries or self.current_bytes > self.max_bytes:
+                _, (_, evicted_bytes) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_bytes
+                self.evictions += 1
+
+    def clear(self):
+        """Drop every cached value"""
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self) -> dict:
+        """Get size and hit/miss/eviction counters"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'bytes': self.current_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_ratio': self.hits / lookups if lookups else 0.0
+            }
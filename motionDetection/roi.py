@@ -0,0 +1,94 @@
+"""
+Region-of-interest state for refining poses on cropped person regions
+"""
+
+import threading
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+import config
+from tracking import iou_matrix
+
+
+def crop_regions(bboxes: np.ndarray, frame_shape: tuple,
+                 padding: float = config.ROI_PADDING,
+                 min_size: int = config.ROI_MIN_CROP_SIZE) -> List[Tuple[int, int, int, int]]:
+    """
+    Padded integer crop regions around person boxes, clipped to the frame
+
+    Args:
+        bboxes: (N, 4) xyxy person boxes
+        frame_shape: Shape of the frame the boxes belong to
+        padding: Margin added on every side, as a fraction of the box's longer side
+        min_size: Minimum crop width and height in pixels
+
+    Returns:
+        List of (x1, y1, x2, y2) crop regions
+    """
+    height, width = frame_shape[:2]
+    regions = []
+    for x1, y1, x2, y2 in bboxes:
+        margin = padding * max(x2 - x1, y2 - y1)
+        center_x, center_y = (x1 + x2) / 2, (y1 + y2) / 2
+        half_w = max((x2 - x1) / 2 + margin, min_size / 2)
+        half_h = max((y2 - y1) / 2 + margin, min_size / 2)
+        regions.append((max(0, int(center_x - half_w)), max(0, int(center_y - half_h)),
+                        min(width, int(np.ceil(center_x + half_w))), min(height, int(np.ceil(center_y + half_h)))))
+    return regions
+
+
+def best_match(candidate_boxes: np.ndarray, reference_box: np.ndarray,
+               min_iou: float = config.ROI_MIN_IOU) -> Optional[int]:
+    """Index of the candidate box overlapping the reference box most, if any overlaps enough"""
+    if len(candidate_boxes) == 0:
+        return None
+    ious = iou_matrix(reference_box.reshape(1, 4), candidate_boxes)[0]
+    index = int(np.argmax(ious))
+    return index if ious[index] >= min_iou else None
+
+
+class RoiState:
+    def __init__(self, full_frame_interval: int = config.ROI_FULL_FRAME_INTERVAL,
+                 max_area_ratio: float = config.ROI_MAX_AREA_RATIO):
+        """
+        Person boxes of one stream's previous frame, used to crop the next one
+
+        Args:
+            full_frame_interval: Run full-frame detection at least every this many frames
+            max_area_ratio: Fall back to full-frame detection when the crops would
+                            cover more than this fraction of the frame
+        """
+        self.full_frame_interval = max(1, int(full_frame_interval))
+        self.max_area_ratio = max_area_ratio
+
+        self.lock = threading.Lock()
+        self.bboxes = np.empty((0, 4), dtype=np.float32)
+        self.frame_shape = None
+        self.frames_since_full = 0
+        self.lost_person = False
+
+    def regions_for(self, frame: np.ndarray) -> Optional[List[Tuple[int, int, int, int]]]:
+        """
+        Get the crop regions for this frame
+
+        Returns:
+            Crop regions, or None when this frame needs full-frame detection
+        """
+        if (len(self.bboxes) == 0 or self.lost_person
+                or frame.shape != self.frame_shape
+                or self.frames_since_full >= self.full_frame_interval - 1):
+            return None
+
+        regions = crop_regions(self.bboxes, frame.shape)
+        area = sum((x2 - x1) * (y2 - y1) for x1, y1, x2, y2 in regions)
+        if area > self.max_area_ratio * frame.shape[0] * frame.shape[1]:
+            return None
+        return regions
+
+    def update(self, frame: np.ndarray, bboxes: np.ndarray, full_frame: bool, lost_person: bool = False):
+        """Remember this frame's person boxes for cropping the next one"""
+        self.bboxes = np.asarray(bboxes, dtype=np.float32).reshape(-1, 4)
+        self.frame_shape = frame.shape
+        self.frames_since_full = 0 if full_frame else self.frames_since_full + 1
+        self.lost_person = lost_person
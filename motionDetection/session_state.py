@@ -0,0 +1,155 @@
+"""
+Per-session temporal detection state with TTL/LRU eviction
+"""
+
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Optional
+
+import config
+
+DEFAULT_SESSION = 'default'
+
+
+class SessionState:
+    def __init__(self, history_size: int = config.SESSION_HISTORY_SIZE):
+        """
+        Temporal state for one camera/client stream
+
+        Args:
+            history_size: Number of recent frames kept in the detection ring buffer
+        """
+        self.lock = threading.Lock()
+        self.consecutive_detections = 0
+        self.last_alert_time = 0
+        self.detection_history = deque(maxlen=history_size)
+        self.last_seen = time.monotonic()
+
+        # PoseTracker for tracking mode, created on first tracked frame
+        self.tracker = None
+        # MotionGate holding the last inferred frame, created on first gated frame
+        self.motion_gate = None
+        # RoiState with the previous frame's boxes, created on first ROI-mode frame
+        self.roi = None
+
+    def update(self, target_detected: bool) -> bool:
+        """
+        Record one frame and check for a confirmed target pose
+
+        Args:
+            target_detected: Whether any person in the frame shows the target pose
+
+        Returns:
+            True if target pose is detected consistently
+        """
+        with self.lock:
+            if target_detected:
+                self.consecutive_detections += 1
+            else:
+                self.consecutive_detections = 0
+
+            # Fixed-size ring buffer drops the oldest frame automatically
+            self.detection_history.append(target_detected)
+
+            return self.consecutive_detections >= config.CONSECUTIVE_FRAMES_THRESHOLD
+
+    def get_consecutive_detections(self) -> int:
+        """Get the number of consecutive frames with the target pose"""
+        with self.lock:
+            return self.consecutive_detections
+
+    def should_show_alert(self) -> bool:
+        """Check if alert should be shown based on timing"""
+        return time.time() - self.last_alert_time > config.ALERT_DURATION
+
+    def trigger_alert(self):
+        """Update alert timing"""
+        self.last_alert_time = time.time()
+
+    def claim_alert(self) -> bool:
+        """Atomically check the alert cooldown and trigger the alert if it has expired"""
+        with self.lock:
+            if not self.should_show_alert():
+                return False
+            self.trigger_alert()
+            return True
+
+
+class SessionStore:
+    def __init__(self, ttl_seconds: float = config.SESSION_TTL_SECONDS,
+                 max_sessions: int = config.SESSION_MAX_COUNT,
+                 history_size: int = config.SESSION_HISTORY_SIZE):
+        """
+        Session-keyed state store with bounded memory
+
+        Sessions idle for longer than ttl_seconds are evicted, and once
+        max_sessions is reached the least recently used session is evicted.
+
+        Args:
+            ttl_seconds: Idle time after which a session is dropped
+            max_sessions: Maximum number of sessions kept in memory
+            history_size: Ring buffer size for each session's detection history
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max(1, int(max_sessions))
+        self.history_size = history_size
+
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self.evicted_expired = 0
+        self.evicted_lru = 0
+
+    def get(self, session_id: str = DEFAULT_SESSION) -> SessionState:
+        """Get the state for a session, creating it if needed"""
+        now = time.monotonic()
+        with self._lock:
+            self._evict_expired(now)
+
+            state = self._sessions.get(session_id)
+            if state is None:
+                state = SessionState(self.history_size)
+                self._sessions[session_id] = state
+                while len(self._sessions) > self.max_sessions:
+                    self._sessions.popitem(last=False)
+                    self.evicted_lru += 1
+            else:
+                self._sessions.move_to_end(session_id)
+
+            state.last_seen = now
+            return state
+
+    def peek(self, session_id: str = DEFAULT_SESSION) -> Optional[SessionState]:
+        """Get the state for a session without creating or touching it"""
+        with self._lock:
+            return self._sessions.get(session_id)
+
+    def remove(self, session_id: str):
+        """Drop a session's state"""
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._sessions)
+
+    def stats(self) -> dict:
+        """Get store size and eviction counters"""
+        with self._lock:
+            self._evict_expired(time.monotonic())
+            return {
+                'active_sessions': len(self._sessions),
+                'max_sessions': self.max_sessions,
+                'ttl_seconds': self.ttl_seconds,
+                'evicted_expired': self.evicted_expired,
+                'evicted_lru': self.evicted_lru
+            }
+
+    def _evict_expired(self, now: float):
+        """Drop idle sessions; the OrderedDict is kept in least-recently-used order"""
+        while self._sessions:
+            session_id, state = next(iter(self._sessions.items()))
+            if now - state.last_seen <= self.ttl_seconds:
+                break
+            del self._sessions[session_id]
+            self.evicted_expired += 1
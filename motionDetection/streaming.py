@@ -0,0 +1,98 @@
+"""
+Persistent frame streaming with latest-frame-wins backpressure
+"""
+
+import threading
+from typing import Any, Callable, Optional
+
+
+class LatestFrameSlot:
+    def __init__(self):
+        """Single-slot mailbox that keeps only the newest frame"""
+        self._condition = threading.Condition()
+        self._frame = None
+        self._closed = False
+        self.frames_received = 0
+        self.frames_dropped = 0
+
+    def put(self, frame: Any):
+        """Store a frame, replacing (and counting as dropped) any frame not yet taken"""
+        with self._condition:
+            if self._frame is not None:
+                self.frames_dropped += 1
+            self._frame = frame
+            self.frames_received += 1
+            self._condition.notify()
+
+    def take(self, timeout: Optional[float] = None) -> Optional[Any]:
+        """
+        Wait for the newest frame
+
+        Returns:
+            The newest frame, or None once the slot is closed (or on timeout)
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self._frame is not None or self._closed, timeout)
+            frame, self._frame = self._frame, None
+            return frame
+
+    def close(self):
+        """Wake up the consumer and stop accepting frames"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+    def stats(self) -> dict:
+        """Get frame counters for this stream"""
+        with self._condition:
+            return {
+                'frames_received': self.frames_received,
+                'frames_dropped': self.frames_dropped
+            }
+
+
+def run_stream(receive: Callable[[], Any], send: Callable[[Any], None],
+               process: Callable[[Any, dict], Any]):
+    """
+    Serve one streaming connection until the client disconnects
+
+    A reader thread keeps pulling frames off the connection into a
+    LatestFrameSlot, so while a frame is being processed newer frames simply
+    replace older ones instead of queueing up. The calling thread processes the
+    newest frame and pushes the result back on the same connection.
+
+    Args:
+        receive: Blocking call returning the next client message (None or an
+                 exception when the connection closes)
+        send: Sends one result message to the client
+        process: Turns a client message and the stream stats into a result message,
+                 or a list of messages sent in order
+    """
+    slot = LatestFrameSlot()
+
+    def reader():
+        try:
+            while True:
+                message = receive()
+                if message is None:
+                    break
+                slot.put(message)
+        except Exception:
+            # Connection closed or broken
+            pass
+        finally:
+            slot.close()
+
+    reader_thread = threading.Thread(target=reader, name='pose-stream-reader', daemon=True)
+    reader_thread.start()
+
+    try:
+        while True:
+            message = slot.take()
+            if message is None:
+                break
+            result = process(message, slot.stats())
+            for reply in (result if isinstance(result, list) else [result]):
+                send(reply)
+    finally:
+        slot.close()
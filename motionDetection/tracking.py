@@ -0,0 +1,212 @@
+"""
+Lightweight pose tracking between full detections (optical flow + IoU matching)
+"""
+
+import threading
+from typing import List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+import config
+
+# Lucas-Kanade parameters for propagating keypoints between frames
+LK_PARAMS = {
+    'winSize': (15, 15),
+    'maxLevel': 2,
+    'criteria': (cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 10, 0.03)
+}
+
+
+def iou_matrix(boxes_a: np.ndarray, boxes_b: np.ndarray) -> np.ndarray:
+    """
+    Pairwise intersection-over-union of two sets of xyxy boxes
+
+    Args:
+        boxes_a: (N, 4) boxes
+        boxes_b: (M, 4) boxes
+
+    Returns:
+        (N, M) IoU matrix
+    """
+    a = boxes_a[:, None, :]
+    b = boxes_b[None, :, :]
+    inter_w = np.clip(np.minimum(a[..., 2], b[..., 2]) - np.maximum(a[..., 0], b[..., 0]), 0, None)
+    inter_h = np.clip(np.minimum(a[..., 3], b[..., 3]) - np.maximum(a[..., 1], b[..., 1]), 0, None)
+    intersection = inter_w * inter_h
+    area_a = (a[..., 2] - a[..., 0]) * (a[..., 3] - a[..., 1])
+    area_b = (b[..., 2] - b[..., 0]) * (b[..., 3] - b[..., 1])
+    union = area_a + area_b - intersection
+    return np.divide(intersection, union, out=np.zeros_like(intersection, dtype=np.float64),
+                     where=union > 0)
+
+
+def match_boxes(previous: np.ndarray, current: np.ndarray,
+                threshold: float = config.TRACKING_IOU_THRESHOLD) -> List[Tuple[int, int]]:
+    """
+    Greedily match boxes by descending IoU
+
+    Returns:
+        List of (previous index, current index) pairs with IoU above threshold
+    """
+    if len(previous) == 0 or len(current) == 0:
+        return []
+
+    ious = iou_matrix(previous, current)
+    matches = []
+    for flat_index in np.argsort(-ious, axis=None):
+        prev_index, cur_index = np.unravel_index(flat_index, ious.shape)
+        if ious[prev_index, cur_index] < threshold:
+            break
+        if any(p == prev_index or c == cur_index for p, c in matches):
+            continue
+        matches.append((int(prev_index), int(cur_index)))
+    return matches
+
+
+def keypoint_boxes(keypoints: np.ndarray,
+                   confidence_threshold: float = config.POSE_CONFIDENCE_THRESHOLD) -> np.ndarray:
+    """Bounding boxes around each person's confident keypoints, for results without a box"""
+    boxes = np.zeros((len(keypoints), 4), dtype=np.float32)
+    for i, person in enumerate(keypoints):
+        visible = person[person[:, 2] > confidence_threshold, :2]
+        if len(visible):
+            boxes[i, :2] = visible.min(axis=0)
+            boxes[i, 2:] = visible.max(axis=0)
+    return boxes
+
+
+class PoseTracker:
+    def __init__(self, detect_interval: int = config.TRACKING_DETECT_INTERVAL,
+                 min_quality: float = config.TRACKING_MIN_QUALITY,
+                 iou_threshold: float = config.TRACKING_IOU_THRESHOLD,
+                 max_dim: int = config.TRACKING_MAX_DIM):
+        """
+        Track one stream's people between full pose detections
+
+        Between detections, keypoints are propagated with pyramidal
+        Lucas-Kanade optical flow on a downscaled grayscale frame and boxes
+        follow their keypoints. People keep their ids across detections by
+        IoU matching against the tracked boxes.
+
+        Args:
+            detect_interval: Run full detection at least every this many frames
+            min_quality: Re-detect when fewer than this fraction of keypoints could be tracked
+            iou_threshold: Minimum IoU for a detection to keep a tracked person's id
+            max_dim: Longest side of the grayscale frame used for optical flow
+        """
+        self.detect_interval = max(1, int(detect_interval))
+        self.min_quality = min_quality
+        self.iou_threshold = iou_threshold
+        self.max_dim = max_dim
+
+        self.lock = threading.Lock()
+        self._previous_gray = None
+        self._frame_shape = None
+        self._next_id = 0
+
+        self.keypoints = np.empty((0, 17, 3), dtype=np.float32)
+        self.bboxes = np.empty((0, 4), dtype=np.float32)
+        self.confidences = np.empty(0, dtype=np.float32)
+        self.ids = np.empty(0, dtype=np.int64)
+
+        self.frames_since_detection = 0
+        self.quality = 1.0
+
+    def needs_detection(self, frame: np.ndarray) -> bool:
+        """Check whether this frame should run the full pose model"""
+        return (self._previous_gray is None
+                or frame.shape != self._frame_shape
+                or self.frames_since_detection >= self.detect_interval - 1
+                or self.quality < self.min_quality)
+
+    def update(self, frame: np.ndarray, keypoints: np.ndarray, bboxes: Optional[np.ndarray],
+               confidences: np.ndarray) -> np.ndarray:
+        """
+        Replace the tracked people with a fresh detection
+
+        Args:
+            frame: Frame the detection ran on
+            keypoints: (N, 17, 3) keypoints in frame coordinates
+            bboxes: (N, 4) xyxy boxes (None to derive them from the keypoints)
+            confidences: (N,) person confidences
+
+        Returns:
+            (N,) stable person ids
+        """
+        if bboxes is None:
+            bboxes = keypoint_boxes(keypoints)
+
+        ids = np.empty(len(keypoints), dtype=np.int64)
+        matched = set()
+        for prev_index, cur_index in match_boxes(self.bboxes, bboxes, self.iou_threshold):
+            ids[cur_index] = self.ids[prev_index]
+            matched.add(cur_index)
+        for cur_index in range(len(keypoints)):
+            if cur_index not in matched:
+                ids[cur_index] = self._next_id
+                self._next_id += 1
+
+        self.keypoints = np.array(keypoints, dtype=np.float32).reshape(-1, 17, 3)
+        self.bboxes = np.array(bboxes, dtype=np.float32).reshape(-1, 4)
+        self.confidences = np.array(confidences, dtype=np.float32)
+        self.ids = ids
+
+        self._previous_gray = self._to_gray(frame)
+        self._frame_shape = frame.shape
+        self.frames_since_detection = 0
+        self.quality = 1.0
+        return ids
+
+    def propagate(self, frame: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Move the tracked people to a new frame with optical flow
+
+        Keypoints that cannot be followed get zero confidence, and
+        self.quality is set to the fraction that could be followed.
+
+        Returns:
+            Tuple of (keypoints, bboxes, confidences, ids) for the new frame
+        """
+        gray = self._to_gray(frame)
+        scale = np.array([gray.shape[1] / frame.shape[1], gray.shape[0] / frame.shape[0]],
+                         dtype=np.float32)
+
+        visible = self.keypoints[..., 2] > config.POSE_CONFIDENCE_THRESHOLD
+        person_index, keypoint_index = np.nonzero(visible)
+
+        if len(person_index) == 0:
+            # Nobody (or nothing confident) to follow: only re-detect on schedule
+            self.quality = 1.0 if len(self.keypoints) == 0 else 0.0
+        else:
+            points = (self.keypoints[person_index, keypoint_index, :2] * scale).astype(np.float32)
+            new_points, status, _ = cv2.calcOpticalFlowPyrLK(
+                self._previous_gray, gray, points.reshape(-1, 1, 2), None, **LK_PARAMS)
+            found = status.reshape(-1).astype(bool)
+            new_points = new_points.reshape(-1, 2) / scale
+            self.quality = float(found.mean())
+
+            # Boxes follow the median motion of their person's tracked keypoints
+            displacement = new_points - self.keypoints[person_index, keypoint_index, :2]
+            for person in range(len(self.keypoints)):
+                moved = found & (person_index == person)
+                if moved.any():
+                    dx, dy = np.median(displacement[moved], axis=0)
+                    self.bboxes[person] += (dx, dy, dx, dy)
+
+            self.keypoints[person_index[found], keypoint_index[found], :2] = new_points[found]
+            self.keypoints[person_index[~found], keypoint_index[~found], 2] = 0.0
+
+        self._previous_gray = gray
+        self.frames_since_detection += 1
+        return self.keypoints.copy(), self.bboxes.copy(), self.confidences.copy(), self.ids.copy()
+
+    def _to_gray(self, frame: np.ndarray) -> np.ndarray:
+        """Grayscale copy of a frame, downscaled to max_dim"""
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        height, width = gray.shape
+        scale = self.max_dim / max(height, width)
+        if scale < 1.0:
+            gray = cv2.resize(gray, (max(1, int(width * scale)), max(1, int(height * scale))),
+                              interpolation=cv2.INTER_AREA)
+        return gray
@@ -200,4 +200,71 @@ def analyze_pose(keypoints: dict) -> dict:
         'target_pose_detected': target_pose,
         'elbows_above_shoulders_and_hands_above_elbows': target_pose,
         'keypoints': keypoints
-    }
\ No newline at end of file
+    }
+
+# Keypoint names ordered by their COCO index, for building dicts from arrays
+KEYPOINT_NAMES = [name for name, _ in sorted(config.KEYPOINTS.items(), key=lambda item: item[1])]
+
+# Keypoints required by is_person_standing
+_STANDING_INDICES = [config.KEYPOINTS[name] for name in
+                     ('left_hip', 'right_hip', 'left_knee', 'right_knee',
+                      'left_ankle', 'right_ankle', 'nose')]
+
+
+def keypoints_array_to_dict(keypoints: np.ndarray) -> dict:
+    """
+    Convert a single person's (17, 3) keypoint array into the named dict format
+    returned by extract_keypoints
+    """
+    return dict(zip(KEYPOINT_NAMES, np.asarray(keypoints, dtype=np.float64).reshape(-1, 3).tolist()))
+
+
+def analyze_poses_array(keypoints: np.ndarray, confidence_threshold: float = 0.3) -> dict:
+    """
+    Vectorized pose analysis for every detected person at once
+
+    Args:
+        keypoints: Array of shape (N_people, 17, 3) with x, y, confidence
+        confidence_threshold: Minimum confidence for a keypoint to count as visible
+
+    Returns:
+        Dictionary of arrays with one entry per person: 'visible' (N, 17) plus
+        boolean 'standing', 'left_arm_raised', 'right_arm_raised', 'arms_raised'
+        and 'target_pose_detected' flags of shape (N,)
+    """
+    keypoints = np.asarray(keypoints, dtype=np.float64).reshape(-1, len(KEYPOINT_NAMES), 3)
+    y = keypoints[..., 1]
+    visible = keypoints[..., 2] > confidence_threshold
+
+    # Standing: legs relatively straight compared to nose-to-ankle height
+    kp = config.KEYPOINTS
+    avg_ankle_y = (y[:, kp['left_ankle']] + y[:, kp['right_ankle']]) / 2
+    body_height = np.abs(avg_ankle_y - y[:, kp['nose']])
+    avg_hip_y = (y[:, kp['left_hip']] + y[:, kp['right_hip']]) / 2
+    avg_knee_y = (y[:, kp['left_knee']] + y[:, kp['right_knee']]) / 2
+    thigh_length = np.abs(avg_knee_y - avg_hip_y)
+    leg_ratio = np.divide(thigh_length, body_height,
+                          out=np.zeros_like(thigh_length), where=body_height > 0)
+    standing = (visible[:, _STANDING_INDICES].all(axis=1) & (body_height > 0) &
+                (leg_ratio > config.STANDING_HEIGHT_RATIO))
+
+    # Arm raise: elbow above shoulder and wrist above elbow, per side
+    def arm_raised(side: str) -> np.ndarray:
+        shoulder, elbow, wrist = (kp[f'{side}_shoulder'], kp[f'{side}_elbow'], kp[f'{side}_wrist'])
+        arm_visible = visible[:, shoulder] & visible[:, elbow] & visible[:, wrist]
+        elbow_above_shoulder = y[:, elbow] < y[:, shoulder] - config.ELBOW_SHOULDER_THRESHOLD
+        hand_above_elbow = y[:, wrist] < y[:, elbow] - config.HAND_ELBOW_THRESHOLD
+        return arm_visible & elbow_above_shoulder & hand_above_elbow
+
+    left_arm_raised = arm_raised('left')
+    right_arm_raised = arm_raised('right')
+    target_pose = left_arm_raised | right_arm_raised
+
+    return {
+        'visible': visible,
+        'standing': standing,
+        'left_arm_raised': left_arm_raised,
+        'right_arm_raised': right_arm_raised,
+        'arms_raised': target_pose,
+        'target_pose_detected': target_pose
+    }
@@ -21,10 +21,10 @@ cleanup() {
 trap cleanup SIGINT SIGTERM
 
 # Start Flask API server in background
-echo "Starting Flask API server on port 5110..."
+echo "Starting pose API server on port 5110..."
 cd motionDetection
 source venv/bin/activate
-python pose_api.py &
+python asgi.py &
 FLASK_PID=$!
 cd ..
 